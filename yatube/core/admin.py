@@ -0,0 +1,86 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils.functional import cached_property
+
+from .models import Job
+
+ADMIN_BATCH_SIZE = 1000
+EXACT_COUNT_LIMIT = 10000
+
+
+def batched_pks(queryset, batch_size=ADMIN_BATCH_SIZE):
+    """Отдаёт первичные ключи queryset пачками, по возрастанию pk."""
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    pks = list(queryset[:batch_size])
+    while pks:
+        yield pks
+        pks = list(queryset.filter(pk__gt=pks[-1])[:batch_size])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает COUNT(*) по всей большой таблице.
+
+    Для queryset без фильтров берёт оценку числа строк из reltuples
+    PostgreSQL. В остальных базах дешёвой оценки нет (MAX(pk) после
+    архивации и удалений сильно завышает число строк, и последние
+    страницы оказываются пустыми), поэтому там, как и при оценке меньше
+    EXACT_COUNT_LIMIT, считает точно.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where or query.distinct or query.combinator:
+            return super().count
+        estimate = self.estimate(self.object_list)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
+
+class BatchedAdmin(admin.ModelAdmin):
+    """ModelAdmin для больших таблиц.
+
+    Не считает полное число строк, использует EstimatedCountPaginator и
+    заменяет delete_selected, который грузит все объекты в память,
+    удалением пачками по ADMIN_BATCH_SIZE.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_in_batches',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_in_batches(self, request, queryset):
+        deleted = 0
+        for pks in batched_pks(queryset):
+            with transaction.atomic():
+                deleted += len(pks)
+                self.model.objects.filter(pk__in=pks).delete()
+        self.message_user(request, f'Удалено объектов: {deleted}')
+    delete_in_batches.allowed_permissions = ('delete',)
+    delete_in_batches.short_description = 'Удалить выбранные (пачками)'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'run_at', 'attempts', 'failed')
+    list_filter = ('name', 'failed')
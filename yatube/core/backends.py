@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+USER_CACHE_KEY = 'auth:user:{}'
+USER_CACHE_TIMEOUT = 60
+# Хеш пароля и почта в кэш не попадают: только то, что нужно запросу.
+USER_CACHE_FIELDS = ('id', 'username', 'first_name', 'last_name',
+                     'is_active', 'is_staff', 'is_superuser', 'last_login')
+# Методы, читающие пароль: их результаты кэшируются вместо него.
+PASSWORD_METHODS = ('get_session_auth_hash', 'has_usable_password')
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+def forget_users(user_ids):
+    """Сбрасывает кэш для изменённых в обход save(), например update()."""
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который достаёт пользователя сессии из кэша.
+
+    В пределах запроса пользователь и так запоминается
+    AuthenticationMiddleware, а кэш избавляет от запроса к auth_user
+    на каждом следующем хите. В кэше лежат несекретные поля и
+    результаты PASSWORD_METHODS; пароль у восстановленного
+    пользователя отложен, так что save() его не затрёт. Запись
+    сбрасывается при сохранении и удалении пользователя, а изменения
+    через update() видны не позже чем через USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                entry = {field: getattr(user, field)
+                         for field in USER_CACHE_FIELDS}
+                entry.update((method, getattr(user, method)())
+                             for method in PASSWORD_METHODS)
+                cache.set(key, entry, USER_CACHE_TIMEOUT)
+            return user
+        model = get_user_model()
+        # from_db ждёт значения в порядке полей модели.
+        names = [field.attname for field in model._meta.concrete_fields
+                 if field.attname in USER_CACHE_FIELDS]
+        user = model.from_db(DEFAULT_DB_ALIAS, names,
+                             [entry[name] for name in names])
+        for method in PASSWORD_METHODS:
+            setattr(user, method, lambda value=entry[method]: value)
+        return user if self.user_can_authenticate(user) else None
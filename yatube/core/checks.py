@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PERFORMANCE = 'performance'
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+@register(PERFORMANCE, deploy=True)
+def check_debug(app_configs, **kwargs):
+    """DEBUG копит все SQL-запросы в connection.queries."""
+    if settings.DEBUG:
+        return [Warning(
+            'DEBUG включён: каждый SQL-запрос сохраняется в памяти.',
+            hint='Запускайте сайт с YATUBE_ENV=production.',
+            id='core.W001',
+        )]
+    return []
+
+
+@register(PERFORMANCE, deploy=True)
+def check_secret_key(app_configs, **kwargs):
+    """Случайный SECRET_KEY сбрасывает сессии при каждом перезапуске."""
+    if not os.getenv('SECRET_KEY'):
+        return [Warning(
+            'SECRET_KEY не задан в окружении и меняется при перезапуске.',
+            hint='Задайте переменную окружения SECRET_KEY.',
+            id='core.W002',
+        )]
+    return []
+
+
+@register(PERFORMANCE, deploy=True)
+def check_session_engine(app_configs, **kwargs):
+    """Сессии в БД — лишний запрос к django_session на каждый хит."""
+    if settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES:
+        return [Warning(
+            f'Сессии хранятся в {settings.SESSION_ENGINE}.',
+            hint='Используйте sessions.backends.cached_db.',
+            id='core.W003',
+        )]
+    return []
+
+
+@register(PERFORMANCE, deploy=True)
+def check_middleware(app_configs, **kwargs):
+    """Без GZip и ConditionalGet ответы уходят несжатыми и целиком."""
+    errors = []
+    required = {
+        'core.middleware.GZipMiddleware': 'core.W004',
+        'django.middleware.http.ConditionalGetMiddleware': 'core.W005',
+    }
+    for middleware, check_id in required.items():
+        if middleware not in settings.MIDDLEWARE:
+            errors.append(Warning(
+                f'{middleware} не подключён.',
+                hint='Добавьте его в MIDDLEWARE.',
+                id=check_id,
+            ))
+    return errors
+
+
+@register(PERFORMANCE, deploy=True)
+def check_staticfiles_storage(app_configs, **kwargs):
+    """Статика без хэша в имени не кэшируется браузером надолго."""
+    if 'Manifest' not in settings.STATICFILES_STORAGE:
+        return [Warning(
+            f'{settings.STATICFILES_STORAGE} не добавляет хэш к именам '
+            f'файлов.',
+            hint='Используйте '
+                 'core.storage.CompressedManifestStaticFilesStorage.',
+            id='core.W006',
+        )]
+    return []
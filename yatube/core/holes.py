@@ -0,0 +1,110 @@
+"""Кэш целых страниц с «дырками» под данные конкретного пользователя.
+
+Страница рендерится один раз на всех: вместо шапки, кнопок и формы
+с CSRF-токеном тег {% hole %} оставляет метку. При каждом ответе метки
+заменяются маленькими шаблонами из holes/, отрисованными для текущего
+запроса, поэтому вошедшие пользователи получают попадания в кэш так же,
+как анонимы. CSRF-токен берётся из cookie запроса, а не из кэша.
+Страница сбрасывается по тегам из заголовка Surrogate-Key ответа view.
+"""
+import base64
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.utils.safestring import mark_safe
+
+from .stampede import get_or_compute
+from .tags import get_surrogate_keys, set_surrogate_keys, versions
+
+HOLE_PREFIX = 'holes/'
+HOLE_RE = re.compile(r'<!--hole:([A-Za-z0-9_=-]+)-->')
+PAGE_KEY = 'holes:page:{}:{}'
+
+
+def render_hole(request, template_name, args):
+    if not template_name.startswith(HOLE_PREFIX):
+        raise ValueError(f'Шаблон дырки вне {HOLE_PREFIX}: {template_name}')
+    return render_to_string(template_name, args, request=request)
+
+
+def placeholder(template_name, args):
+    payload = json.dumps([template_name, args]).encode()
+    return mark_safe(
+        f'<!--hole:{base64.urlsafe_b64encode(payload).decode()}-->')
+
+
+def fill_holes(request, content):
+    def replace(match):
+        template_name, args = json.loads(
+            base64.urlsafe_b64decode(match.group(1)))
+        return render_hole(request, template_name, args)
+    return HOLE_RE.sub(replace, content)
+
+
+def page_key(request, key_prefix):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(key_prefix, path)
+
+
+def is_current(page):
+    tags, tag_versions = page[2], page[3]
+    return versions(tags) == tag_versions
+
+
+def cacheable(response):
+    return (response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', ''))
+
+
+def cache_page_with_holes(timeout, key_prefix='default'):
+    """Как cache_page, но одна копия страницы на всех пользователей.
+
+    View помечает ответ, который нельзя делить, через
+    patch_cache_control(response, private=True), а теги страницы —
+    через core.tags.set_surrogate_keys. Пересчёт истёкшей
+    страницы идёт через stampede.get_or_compute: одна view на ключ,
+    остальные запросы в это время получают прежнюю копию.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            rendered = []
+
+            def compute():
+                request.punch_holes = True
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    request.punch_holes = False
+                rendered.append(response)
+                if cacheable(response):
+                    tags = get_surrogate_keys(response)
+                    return (response.content.decode(response.charset),
+                            response['Content-Type'], tags, versions(tags))
+                return None
+
+            page = get_or_compute(page_key(request, key_prefix), compute,
+                                  timeout, prefix=key_prefix, valid=is_current)
+            if rendered:
+                response = rendered[0]
+                if not response.streaming:
+                    response.content = fill_holes(
+                        request, response.content.decode(response.charset))
+                return response
+            content, content_type, tags, _ = page
+            response = HttpResponse(fill_holes(request, content),
+                                    content_type=content_type)
+            set_surrogate_keys(response, tags)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
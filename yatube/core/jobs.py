@@ -0,0 +1,100 @@
+"""Очередь отложенных задач и периодических функций для runworker.
+
+Задачи регистрируются декоратором @job в модулях <app>/jobs.py и
+ставятся в очередь через enqueue(). Обработчик получает сразу все
+payload одной пачки, чтобы делать общую работу один раз на пачку.
+Функции @periodic вызываются на каждом такте воркера.
+"""
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+
+handlers = {}
+periodic_tasks = []
+
+
+def job(name):
+    def decorator(func):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def periodic(func):
+    periodic_tasks.append(func)
+    return func
+
+
+def discover():
+    autodiscover_modules('jobs')
+
+
+def enqueue(name, run_at=None, **payload):
+    """Ставит задачу в очередь после коммита текущей транзакции."""
+    def create():
+        Job.objects.create(name=name, payload=json.dumps(payload),
+                           run_at=run_at or timezone.now())
+    transaction.on_commit(create)
+
+
+def claim(batch_size=BATCH_SIZE):
+    """Захватывает до batch_size готовых задач для этого воркера."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    free = Job.objects.filter(run_at__lte=now, failed=False).exclude(
+        locked_until__gt=now)
+    ids = list(free.values_list('pk', flat=True)[:batch_size])
+    free.filter(pk__in=ids).update(locked_by=token,
+                                   locked_until=now + LEASE)
+    return list(Job.objects.filter(locked_by=token))
+
+
+def run_jobs(batch_size=BATCH_SIZE):
+    """Выполняет одну пачку задач, группируя их по имени."""
+    jobs = claim(batch_size)
+    by_name = {}
+    for claimed in jobs:
+        by_name.setdefault(claimed.name, []).append(claimed)
+    for name, group in by_name.items():
+        try:
+            handlers[name]([json.loads(item.payload) for item in group])
+        except Exception as error:
+            logger.exception('Job %s failed', name)
+            retry(group, error)
+        else:
+            Job.objects.filter(pk__in=[item.pk for item in group]).delete()
+    return len(jobs)
+
+
+def retry(group, error):
+    for item in group:
+        item.attempts += 1
+        item.failed = item.attempts >= MAX_ATTEMPTS
+        item.run_at = timezone.now() + timedelta(minutes=2 ** item.attempts)
+        item.locked_by, item.locked_until = '', None
+        item.error = repr(error)
+    Job.objects.bulk_update(group, ['attempts', 'failed', 'run_at',
+                                    'locked_by', 'locked_until', 'error'])
+
+
+def tick(batch_size=BATCH_SIZE):
+    """Один такт воркера: периодические функции, затем очередь."""
+    for task in periodic_tasks:
+        try:
+            task()
+        except Exception:
+            logger.exception('Periodic task %s failed', task.__name__)
+    return run_jobs(batch_size)
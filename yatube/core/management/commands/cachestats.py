@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.stampede import METRICS, metrics
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания, пересчёты и отдачи устаревших страниц.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefixes', nargs='*', default=['index', 'posts'],
+            help='Префиксы ключей кэша страниц.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('prefix\t' + '\t'.join(METRICS))
+        for prefix in options['prefixes']:
+            values = metrics(prefix)
+            self.stdout.write(prefix + '\t' + '\t'.join(
+                str(values[name]) for name in METRICS))
@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Проверяет настройки, мешающие производительности.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Завершиться с ошибкой при любом предупреждении.',
+        )
+
+    def handle(self, *args, **options):
+        call_command(
+            'check', deploy=True, tags=['performance'],
+            fail_level='WARNING' if options['fail'] else 'ERROR',
+        )
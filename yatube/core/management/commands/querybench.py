@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Считает SQL-запросы на один запрос к странице '
+            'для анонима и для авторизованного пользователя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            default=['/', '/about/author/'])
+        parser.add_argument('--username',
+                            help='Пользователь для авторизованных замеров.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--clear-cache', action='store_true',
+            help='Очистить кэш перед замером. Стирает весь общий кэш '
+                 '(сессии, счётчики, страницы); без DEBUG не работает.')
+
+    def handle(self, *args, **options):
+        clients = {'anonymous': Client()}
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["username"]} не найден')
+            clients['authenticated'] = Client()
+            clients['authenticated'].force_login(user)
+        if options['clear_cache']:
+            if not settings.DEBUG:
+                raise CommandError('--clear-cache доступен только при DEBUG')
+            cache.clear()
+        for path in options['paths']:
+            for name, client in clients.items():
+                self.bench(client, name, path, options['repeat'])
+
+    def bench(self, client, name, path, repeat):
+        client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                client.get(path)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{path} [{name}]: '
+            f'{len(queries) / repeat:.1f} запросов, '
+            f'{elapsed / repeat * 1000:.1f} мс на запрос'
+        )
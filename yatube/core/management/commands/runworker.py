@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = ('Фоновый воркер: публикует отложенные посты и выполняет '
+            'задачи из очереди core.Job.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Пауза между тактами, если очередь пуста.')
+        parser.add_argument('--batch-size', type=int,
+                            default=jobs.BATCH_SIZE)
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить один такт и выйти.')
+
+    def handle(self, *args, **options):
+        jobs.discover()
+        while True:
+            done = jobs.tick(options['batch_size'])
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if options['once']:
+                return
+            if done < options['batch_size']:
+                time.sleep(options['interval'])
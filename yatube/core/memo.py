@@ -0,0 +1,37 @@
+"""Запоминание повторяющихся запросов на время одного HTTP-запроса.
+
+RequestMemoMiddleware открывает словарь в contextvar, memoize() кладёт
+туда результаты. View и шаблонные теги, вызывающие memoize с одним
+ключом, получают одно значение и один запрос к БД. Вне запроса
+(команды, воркер) memoize просто вызывает factory.
+"""
+from contextvars import ContextVar
+
+_memo = ContextVar('request_memo', default=None)
+
+
+def memoize(key, factory):
+    store = _memo.get()
+    if store is None:
+        return factory()
+    if key not in store:
+        store[key] = factory()
+    return store[key]
+
+
+def forget(key):
+    store = _memo.get()
+    if store is not None:
+        store.pop(key, None)
+
+
+class RequestMemoMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _memo.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _memo.reset(token)
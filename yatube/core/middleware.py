@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+FOREVER = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = 60
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+class RangeFile:
+    """Читает из файла не больше length байт, начиная с offset."""
+
+    def __init__(self, file, offset, length):
+        file.seek(offset)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику и загруженные файлы без веб-сервера.
+
+    Для файлов с хэшем в имени ставит кэширование на год, выбирает
+    заранее сжатую .br/.gz копию по Accept-Encoding, отвечает 304 на
+    условные запросы и 206 на Range. Целые файлы уходят через
+    FileResponse, так что WSGI-сервер может отправить их sendfile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.roots = [
+            (prefix, root) for prefix, root in (
+                (settings.STATIC_URL, getattr(settings, 'STATIC_ROOT', None)),
+                (settings.MEDIA_URL, settings.MEDIA_ROOT),
+            ) if prefix and root
+        ]
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            path = self.find_file(request.path_info)
+            if path is not None:
+                return self.serve(request, path)
+        return self.get_response(request)
+
+    def find_file(self, url):
+        for prefix, root in self.roots:
+            if url.startswith(prefix):
+                try:
+                    path = safe_join(root, url[len(prefix):])
+                except SuspiciousFileOperation:
+                    return None
+                return path if os.path.isfile(path) else None
+        return None
+
+    def serve(self, request, path):
+        content_type = mimetypes.guess_type(path)[0]
+        headers = {'Vary': 'Accept-Encoding', 'Accept-Ranges': 'bytes'}
+        if HASHED_NAME.search(path):
+            headers['Cache-Control'] = f'public, max-age={FOREVER}, immutable'
+        else:
+            headers['Cache-Control'] = f'public, max-age={DEFAULT_MAX_AGE}'
+
+        range_header = request.META.get('HTTP_RANGE')
+        if not range_header:
+            path = self.choose_variant(request, path, headers)
+        stat = os.stat(path)
+        headers['Last-Modified'] = http_date(stat.st_mtime)
+        headers['ETag'] = '"{:x}-{:x}{}"'.format(
+            int(stat.st_mtime), stat.st_size,
+            headers.get('Content-Encoding', ''),
+        )
+
+        if self.not_modified(request, headers['ETag'], stat.st_mtime):
+            response = HttpResponse(status=304)
+        elif range_header:
+            response = self.serve_range(path, range_header, stat.st_size)
+        elif request.method == 'HEAD':
+            response = HttpResponse()
+            response['Content-Length'] = stat.st_size
+        else:
+            response = FileResponse(open(path, 'rb'))
+            response['Content-Length'] = stat.st_size
+        if response.status_code != 304:
+            response['Content-Type'] = (
+                content_type or 'application/octet-stream')
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    @staticmethod
+    def choose_variant(request, path, headers):
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                headers['Content-Encoding'] = encoding
+                return path + suffix
+        return path
+
+    @staticmethod
+    def not_modified(request, etag, mtime):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in if_none_match or if_none_match.strip() == '*'
+        since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and int(mtime) <= since
+
+    @staticmethod
+    def serve_range(path, range_header, size):
+        match = RANGE.match(range_header.strip())
+        if not match or match.groups() == ('', ''):
+            response = FileResponse(open(path, 'rb'))
+            response['Content-Length'] = size
+            return response
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+        if start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, length), status=206)
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
+
+
+class GZipMiddleware(BaseGZipMiddleware):
+    """GZipMiddleware, который не трогает потоки UNCOMPRESSED_TYPES.
+
+    Django сжимает потоковый ответ без сброса буфера после каждого
+    куска, так что события SSE застревали бы в gzip до конца потока.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type in UNCOMPRESSED_TYPES:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенная задача для фонового воркера (manage.py runworker)."""
+
+    name = models.CharField(max_length=100, db_index=True)
+    payload = models.TextField(default='{}')
+    run_at = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=32, blank=True, db_index=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    failed = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('run_at',)
+
+    def __str__(self):
+        return f'{self.name} ({self.run_at:%Y-%m-%d %H:%M})'
@@ -0,0 +1,80 @@
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+REJECTED_KEY = 'ratelimit:rejected:{}'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_key(request, key):
+    if key in ('user', 'user_or_ip') and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if key == 'user':
+        return None
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def hit(identity, limit, period):
+    """Считает запрос и возвращает True, если лимит превышен.
+
+    Скользящее окно из двух счётчиков в кэше: запросы прошлого окна
+    учитываются с весом, убывающим по мере хода текущего. Это ведёт
+    себя как ведро на limit токенов, пополняемое limit раз за period,
+    но обходится одним атомарным incr на запрос.
+    """
+    now = time.time()
+    window = int(now // period)
+    current_key = f'ratelimit:{identity}:{window}'
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        cache.set(current_key, 1, period * 2)
+        current = 1
+    previous = cache.get(f'ratelimit:{identity}:{window - 1}', 0)
+    elapsed = now % period / period
+    return previous * (1 - elapsed) + current > limit
+
+
+def rejected_count(group):
+    return cache.get(REJECTED_KEY.format(group), 0)
+
+
+def ratelimit(group, rate, key='user_or_ip', methods=('POST',)):
+    """Ограничивает частоту запросов к view до того, как она тронет БД.
+
+    rate вида '10/m' можно переопределить в settings.RATELIMITS[group].
+    key: 'user', 'ip' или 'user_or_ip'. На превышение отвечает 429.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view_func(request, *args, **kwargs)
+            limit, period = parse_rate(
+                getattr(settings, 'RATELIMITS', {}).get(group, rate))
+            identity = client_key(request, key)
+            if identity and hit(f'{group}:{identity}', limit, period):
+                rejected = REJECTED_KEY.format(group)
+                cache.add(rejected, 0, None)
+                cache.incr(rejected)
+                logger.warning('Rate limit %s exceeded by %s',
+                               group, identity)
+                return too_many_requests(period)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
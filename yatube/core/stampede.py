@@ -0,0 +1,87 @@
+"""Защита кэша от лавины пересчётов при истечении популярного ключа.
+
+Запись хранится дольше своего срока на STALE_GRACE секунд. Незадолго
+до истечения один из запросов с растущей вероятностью берётся пересчитать
+её заранее (XFetch). Пересчитывает только тот, кто взял блокировку
+cache.add; остальные в это время получают устаревшее значение.
+"""
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+STALE_GRACE = 60
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+BETA = 1.0
+METRIC_KEY = 'stampede:{}:{}'
+METRICS = ('hits', 'rebuilds', 'early', 'stale', 'waits')
+
+
+def count(name, prefix):
+    key = METRIC_KEY.format(name, prefix)
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def metrics(prefix):
+    """Счётчики hits, rebuilds, early, stale и waits для prefix."""
+    return {name: cache.get(METRIC_KEY.format(name, prefix), 0)
+            for name in METRICS}
+
+
+def should_recompute_early(delta, expires_at, beta=BETA):
+    """Чем ближе срок и чем дольше пересчёт, тем вероятнее True."""
+    return time.time() - delta * beta * math.log(
+        1 - random.random()) >= expires_at
+
+
+def get_or_compute(key, compute, timeout, prefix='default', beta=BETA,
+                   valid=None):
+    """Значение key из кэша, при необходимости пересчитанное compute().
+
+    Если compute() вернул None, значение не кладётся в кэш. Значение,
+    для которого valid(value) ложно, считается просроченным.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if valid is not None and not valid(value):
+            expires_at = 0
+        if time.time() < expires_at:
+            if not should_recompute_early(delta, expires_at, beta):
+                count('hits', prefix)
+                return value
+            count('early', prefix)
+    lock = f'{key}:lock'
+    locked = cache.add(lock, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            count('stale', prefix)
+            return entry[0]
+        entry = wait_for(key, lock)
+        if entry is not None:
+            count('waits', prefix)
+            return entry[0]
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        if value is not None:
+            cache.set(key, (value, delta, time.time() + timeout),
+                      timeout + STALE_GRACE)
+        count('rebuilds', prefix)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock)
+
+
+def wait_for(key, lock):
+    """Ждёт, пока держатель lock положит key; None, если не дождались."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline and cache.get(lock) is not None:
+        time.sleep(LOCK_POLL)
+    return cache.get(key)
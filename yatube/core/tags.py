@@ -0,0 +1,46 @@
+"""Теги кэша (surrogate keys): сброс всех записей, показывающих объект.
+
+Запись хранит версии своих тегов на момент записи. purge() поднимает
+версии тегов, и записи с устаревшими версиями считаются просроченными,
+так что искать и удалять их ключи не нужно. Теги ответа уходят
+в заголовке Surrogate-Key, а сигнал purged позволяет обратному прокси
+или его заглушке сбросить свой кэш по тем же тегам.
+"""
+import time
+
+from django.core.cache import cache
+from django.dispatch import Signal
+
+TAG_KEY = 'tag:{}'
+SURROGATE_KEY = 'Surrogate-Key'
+
+purged = Signal(providing_args=['tags'])
+
+
+def versions(tags):
+    """Текущие версии тегов одним get_many."""
+    keys = {TAG_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        # Начальная версия от времени: вытесненный и заново созданный
+        # тег не совпадёт с версией, сохранённой в старой записи.
+        cache.add(key, time.time_ns(), None)
+        found[key] = cache.get(key)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def purge(*tags):
+    for tag in tags:
+        key = TAG_KEY.format(tag)
+        cache.add(key, time.time_ns(), None)
+        cache.incr(key)
+    purged.send(sender=None, tags=tags)
+
+
+def set_surrogate_keys(response, tags):
+    response[SURROGATE_KEY] = ' '.join(sorted(set(tags)))
+    return response
+
+
+def get_surrogate_keys(response):
+    return response.get(SURROGATE_KEY, '').split()
@@ -0,0 +1,14 @@
+from django import template
+
+from core.holes import placeholder, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **args):
+    """Пользовательская часть страницы, кэшируемой cache_page_with_holes."""
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return placeholder(template_name, args)
+    return render_hole(request, template_name, args)
@@ -0,0 +1,366 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.lookups import user_by_username
+from posts.models import Comment, Post
+
+from .backends import forget_users, user_cache_key
+from .checks import PERFORMANCE
+from .holes import fill_holes, placeholder
+from .jobs import handlers, run_jobs
+from .memo import RequestMemoMiddleware, memoize
+from .models import Job
+from .ratelimit import hit, rejected_count
+from .stampede import get_or_compute, metrics
+from .tags import purge, purged, versions
+from .tiered import TieredCache
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def performance_check_ids():
+    return {
+        error.id for error in run_checks(tags=[PERFORMANCE],
+                                         include_deployment_checks=True)
+    }
+
+
+class PerformanceChecksTests(TestCase):
+    @override_settings(DEBUG=True)
+    def test_debug_is_reported(self):
+        self.assertIn('core.W001', performance_check_ids())
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_sessions_are_not_reported(self):
+        self.assertNotIn('core.W003', performance_check_ids())
+
+    def test_missing_middleware_is_reported(self):
+        ids = performance_check_ids()
+        self.assertIn('core.W004', ids)
+        self.assertIn('core.W005', ids)
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Test')
+        self.client.force_login(self.user)
+
+    def test_warm_authenticated_request_skips_session_and_user(self):
+        self.client.get('/about/author/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/about/author/')
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_save_drops_cached_user(self):
+        self.client.get('/about/author/')
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        response = self.client.get('/about/author/')
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_cached_user_has_no_credentials(self):
+        self.client.get('/about/author/')
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', entry)
+        self.assertNotIn('email', entry)
+        response = self.client.get('/about/author/')
+        cached = response.context['user']
+        self.assertIn('password', cached.get_deferred_fields())
+        self.user.set_password('secret')
+        self.user.save()
+        cached.first_name = 'Имя'
+        cached.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('secret'))
+
+    def test_deactivated_user_is_logged_out(self):
+        self.client.get('/about/author/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        forget_users([self.user.pk])
+        response = self.client.get('/about/author/')
+        self.assertFalse(response.context['user'].is_authenticated)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class StaticFilesMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        cls.content = b'0123456789' * 100
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'a.txt'),
+                  'wb') as file:
+            file.write(cls.content)
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'a.txt.gz'),
+                  'wb') as file:
+            file.write(gzip.compress(cls.content))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_serves_media_file(self):
+        response = self.client.get('/media/posts/a.txt')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertIn('ETag', response)
+
+    def test_serves_precompressed_variant(self):
+        response = self.client.get('/media/posts/a.txt',
+                                   HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            self.content)
+
+    def test_range_request(self):
+        response = self.client.get('/media/posts/a.txt',
+                                   HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1000')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_etag_gives_not_modified(self):
+        etag = self.client.get('/media/posts/a.txt')['ETag']
+        response = self.client.get('/media/posts/a.txt',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_path_traversal_is_not_served(self):
+        response = self.client.get('/media/../manage.py')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Test')
+        self.client.force_login(self.user)
+
+    @override_settings(RATELIMITS={'add_comment': '2/m'})
+    def test_limit_returns_429_without_writes(self):
+        author = User.objects.create_user(username='Author')
+        post = Post.objects.create(text='Текст', author=author)
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        for _ in range(2):
+            self.client.post(url, {'text': 'Комментарий'})
+        response = self.client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(response.templates, [])
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(rejected_count('add_comment'), 1)
+
+    def test_limit_is_per_user(self):
+        limited = [hit('test:user:1', 1, 60) for _ in range(2)]
+        self.assertEqual(limited, [False, True])
+        self.assertFalse(hit('test:user:2', 1, 60))
+
+
+class JobsTests(TestCase):
+    def test_failed_batch_is_retried_later(self):
+        calls = []
+
+        def broken(payloads):
+            calls.append(payloads)
+            raise ValueError
+
+        handlers['test.broken'] = broken
+        Job.objects.create(name='test.broken', payload='{"n": 1}')
+        self.assertEqual(run_jobs(), 1)
+        job = Job.objects.get()
+        self.assertEqual(calls, [[{'n': 1}]])
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(run_jobs(), 0)
+        del handlers['test.broken']
+
+    def test_jobs_are_batched_by_name(self):
+        calls = []
+        handlers['test.collect'] = calls.append
+        for n in range(3):
+            Job.objects.create(name='test.collect', payload=f'{{"n": {n}}}')
+        run_jobs()
+        self.assertEqual(calls, [[{'n': 0}, {'n': 1}, {'n': 2}]])
+        self.assertFalse(Job.objects.exists())
+        del handlers['test.collect']
+
+
+class RequestMemoTests(TestCase):
+    def test_memoize_outside_request_calls_factory(self):
+        calls = []
+        memoize('key', lambda: calls.append(1))
+        memoize('key', lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+    def test_memoize_inside_request_calls_factory_once(self):
+        calls = []
+
+        def view(request):
+            memoize('key', lambda: calls.append(1))
+            memoize('key', lambda: calls.append(1))
+            return None
+
+        RequestMemoMiddleware(view)(None)
+        RequestMemoMiddleware(view)(None)
+        self.assertEqual(len(calls), 2)
+
+
+class HolePunchedCacheTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        cache.clear()
+
+    def test_page_is_shared_and_holes_are_per_user(self):
+        url = reverse('posts:profile', args=['Author'])
+        self.client.force_login(self.author)
+        first = self.client.get(url)
+        self.assertIn('page_obj', first.context)
+        self.assertContains(first, 'Пользователь: Author')
+        self.client.force_login(self.reader)
+        second = self.client.get(url)
+        self.assertNotIn('page_obj', second.context)
+        self.assertContains(second, 'Пользователь: Reader')
+        self.assertNotContains(second, 'Пользователь: Author')
+        self.assertNotContains(second, '<!--hole:')
+
+    def test_post_save_drops_cached_pages(self):
+        url = reverse('posts:profile', args=['Author'])
+        self.client.get(url)
+        Post.objects.create(text='Ещё', author=self.author)
+        self.assertEqual(len(self.client.get(url).context['page_obj']), 2)
+
+    def test_private_responses_are_not_cached(self):
+        self.post.is_published = False
+        self.post.save()
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(url).status_code,
+                         HTTPStatus.NOT_FOUND)
+
+    def test_only_hole_templates_are_filled(self):
+        with self.assertRaises(ValueError):
+            fill_holes(None, placeholder('base.html', {}))
+
+
+class StampedeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fresh_value_is_computed_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'page'
+
+        for _ in range(3):
+            self.assertEqual(get_or_compute('key', compute, 60), 'page')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(metrics('default')['hits'], 2)
+
+    def test_stale_value_is_served_while_rebuild_is_locked(self):
+        cache.set('key', ('old', 0.1, time.time() - 1), 60)
+        cache.add('key:lock', 1)
+        value = get_or_compute('key', lambda: self.fail('пересчёт'), 60)
+        self.assertEqual(value, 'old')
+        self.assertEqual(metrics('default')['stale'], 1)
+
+    def test_expensive_value_is_recomputed_early(self):
+        cache.set('key', ('old', 10 ** 6, time.time() + 60), 60)
+        self.assertEqual(get_or_compute('key', lambda: 'new', 60), 'new')
+        self.assertEqual(metrics('default')['early'], 1)
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_none_is_not_cached(self):
+        get_or_compute('key', lambda: None, 60)
+        self.assertIsNone(cache.get('key'))
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_l1_hit_skips_shared_cache(self):
+        tier = TieredCache('test')
+        tier.get('key', lambda: ['value'])
+        cache.delete('tiered:test:1:key')
+        self.assertEqual(tier.get('key', lambda: self.fail('загрузка')),
+                         ['value'])
+
+    def test_version_stamp_invalidates_other_processes(self):
+        first, second = TieredCache('test'), TieredCache('test')
+        first.get('key', lambda: 'old')
+        second.invalidate()
+        self.assertEqual(first.get('key', lambda: 'new'), 'new')
+
+    def test_l1_is_bounded(self):
+        tier = TieredCache('test', maxsize=2)
+        for key in 'abc':
+            tier.get(key, lambda: key)
+        self.assertEqual(list(tier.entries), ['b', 'c'])
+
+    def test_profile_and_group_lookups_are_cached(self):
+        User.objects.create_user(username='Author')
+        user_by_username('Author')
+        with self.assertNumQueries(0):
+            self.assertEqual(user_by_username('Author').username, 'Author')
+
+    def test_cached_user_has_no_credentials(self):
+        User.objects.create_user(username='Author', email='a@example.com',
+                                 password='secret')
+        deferred = user_by_username('Author').get_deferred_fields()
+        self.assertTrue({'password', 'email'} <= deferred)
+
+
+class CacheTagsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_purge_changes_only_its_tags(self):
+        before = versions(['post:1', 'post:2'])
+        received = []
+
+        def receiver(tags, **kwargs):
+            received.extend(tags)
+
+        purged.connect(receiver)
+        self.addCleanup(purged.disconnect, receiver)
+        purge('post:1')
+        after = versions(['post:1', 'post:2'])
+        self.assertNotEqual(before['post:1'], after['post:1'])
+        self.assertEqual(before['post:2'], after['post:2'])
+        self.assertEqual(received, ['post:1'])
+
+
+class QueryBenchTests(TestCase):
+    def test_does_not_clear_shared_cache(self):
+        cache.set('session-like', 1)
+        call_command('querybench', '/about/author/', repeat=1,
+                     stdout=StringIO())
+        self.assertEqual(cache.get('session-like'), 1)
+
+    def test_clear_cache_requires_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('querybench', clear_cache=True, stdout=StringIO())
@@ -0,0 +1,72 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед django.core.cache.
+
+L1 ограничен числом записей и ttl. Каждая запись помнит версию своего
+пространства имён, взятую из L2; invalidate() поднимает версию в L2,
+и все процессы перестают доверять своим L1-записям. Версия читается
+из L2 один раз за HTTP-запрос (core.memo), дальше попадания в L1 не
+стоят ни одного сетевого обращения.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .memo import forget, memoize
+
+L1_SIZE = 1024
+L1_TTL = 60
+L2_TIMEOUT = 60 * 60
+VERSION_KEY = 'tiered:version:{}'
+VALUE_KEY = 'tiered:{}:{}:{}'
+
+
+class TieredCache:
+    def __init__(self, namespace, maxsize=L1_SIZE, ttl=L1_TTL,
+                 timeout=L2_TIMEOUT):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def version(self):
+        return memoize(
+            ('tiered', self.namespace),
+            lambda: cache.get_or_set(
+                VERSION_KEY.format(self.namespace), 1, None),
+        )
+
+    def get(self, key, loader):
+        """Значение key из L1, L2 или loader(); None не кэшируется."""
+        version = self.version()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now and entry[1] == version:
+                self.entries.move_to_end(key)
+                return copy.copy(entry[2])
+        l2_key = VALUE_KEY.format(self.namespace, version, key)
+        value = cache.get(l2_key)
+        if value is None:
+            value = loader()
+            if value is None:
+                return None
+            cache.set(l2_key, value, self.timeout)
+        with self.lock:
+            self.entries[key] = (now + self.ttl, version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return copy.copy(value)
+
+    def invalidate(self):
+        """Сбрасывает пространство имён во всех процессах."""
+        version_key = VERSION_KEY.format(self.namespace)
+        cache.add(version_key, 1, None)
+        cache.incr(version_key)
+        forget(('tiered', self.namespace))
+        with self.lock:
+            self.entries.clear()
@@ -1,3 +1,4 @@
+from django.http import HttpResponse
 from django.shortcuts import render
 
 
@@ -15,3 +16,12 @@ def internal_server_error(request, *args):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def too_many_requests(retry_after):
+    """Статичный ответ без шаблона: не трогает сессию, пользователя и БД."""
+    response = HttpResponse(
+        f'Слишком много запросов. Попробуйте через {retry_after} с.',
+        content_type='text/plain; charset=utf-8', status=429)
+    response['Retry-After'] = retry_after
+    return response
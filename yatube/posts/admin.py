@@ -1,17 +1,87 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
 
-from .models import Comment, Follow, Group, Post
+from core.admin import BatchedAdmin, batched_pks
 
+from .deletion import delete_group, delete_user
+from .markup import render_posts
+from .models import Comment, Follow, Group, Post, User
 
-class PostAdmin(admin.ModelAdmin):
+
+def report_message(obj, report):
+    counts = ', '.join(f'{label}: {count}' for label, count in report.items())
+    return f'{obj} удалён ({counts})'
+
+
+class PostAdmin(BatchedAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    list_editable = ('group',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+    empty_value_display = '-пусто-'
+    actions = BatchedAdmin.actions + ('clear_group',)
+
+    def save_model(self, request, obj, form, change):
+        render_posts([obj])
+        super().save_model(request, obj, form, change)
+
+    def clear_group(self, request, queryset):
+        for pks in batched_pks(queryset):
+            with transaction.atomic():
+                Post.objects.filter(pk__in=pks).update(group=None)
+        self.message_user(request, 'Посты убраны из групп')
+    clear_group.allowed_permissions = ('change',)
+    clear_group.short_description = 'Убрать из группы (пачками)'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+    actions = ('delete_fast',)
+
+    def delete_fast(self, request, queryset):
+        for group in queryset:
+            self.message_user(request,
+                              report_message(group, delete_group(group)))
+    delete_fast.allowed_permissions = ('delete',)
+    delete_fast.short_description = ('Удалить группы, оставив посты '
+                                     '(пачками)')
+
+
+class CommentAdmin(BatchedAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    date_hierarchy = 'created'
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
     empty_value_display = '-пусто-'
 
 
+class FollowAdmin(BatchedAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+
+
+class ContentUserAdmin(UserAdmin):
+    actions = ('delete_with_content',)
+
+    def delete_with_content(self, request, queryset):
+        for user in queryset:
+            self.message_user(request,
+                              report_message(user, delete_user(user)))
+    delete_with_content.allowed_permissions = ('delete',)
+    delete_with_content.short_description = ('Удалить пользователей '
+                                             'со всем содержимым (пачками)')
+
+
+admin.site.unregister(User)
+admin.site.register(User, ContentUserAdmin)
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
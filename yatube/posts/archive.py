@@ -0,0 +1,85 @@
+"""Перенос старых постов с комментариями в архивные таблицы.
+
+Ленты читают только горячую таблицу Post, поэтому её индексы остаются
+маленькими. Перенос идёт пачками, каждая в своей транзакции.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .thumbnails import METADATA_FIELDS
+
+BATCH_SIZE = 500
+POST_FIELDS = ('id', 'text', 'excerpt', 'is_truncated', 'text_html',
+               'pub_date', 'author_id', 'image', *METADATA_FIELDS,
+               'group_id')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size=BATCH_SIZE):
+    """Переносит до batch_size самых старых постов старше cutoff."""
+    ids = list(Post.objects.filter(
+        is_published=True, pub_date__lt=cutoff
+    ).order_by('pub_date').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**row) for row in
+            Post.objects.filter(pk__in=ids).values(*POST_FIELDS))
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row) for row in
+            Comment.objects.filter(post_id__in=ids).values(*COMMENT_FIELDS))
+        Post.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_posts(days=None, batch_size=BATCH_SIZE):
+    cutoff, total = archive_cutoff(days), 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+
+
+class PostChain:
+    """Горячие посты, за ними архивные — одним списком для Paginator.
+
+    В архив уходят только посты старше всех горячих, поэтому порядок
+    по -pub_date сохраняется простым склеиванием двух queryset.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+
+    @cached_property
+    def hot_count(self):
+        return self.hot.count()
+
+    def count(self):
+        return self.hot_count + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        items = []
+        if start < self.hot_count:
+            items += self.hot[start:min(stop, self.hot_count)]
+        if stop > self.hot_count:
+            items += self.archived[max(start - self.hot_count, 0):
+                                   stop - self.hot_count]
+        return items
@@ -1 +1,20 @@
 FIRST_TEN = 10
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+INBOX_PAGE_SIZE = 20
+DIGEST_INTERVAL = 60 * 60
+DIGEST_BATCH_SIZE = 500
+RECOMMENDATIONS_TOP_K = 5
+RECOMMENDATIONS_INTERVAL = 60 * 60 * 24
+MAX_COMMENTERS_PER_POST = 200
+ARCHIVE_INTERVAL = 60 * 60 * 24
+STREAM_BUFFER_SIZE = 256
+STREAM_HEARTBEAT = 15
+STREAM_LIFETIME = 5 * 60
+STREAM_RETRY_MS = 3000
+PAGE_CACHE_TIMEOUT = 60
+THUMBNAIL_VARIANTS = ((THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS),)
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
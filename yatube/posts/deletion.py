@@ -0,0 +1,103 @@
+"""Быстрое удаление пользователя или группы вместе с содержимым.
+
+Collector Django загружает в память каждый связанный объект и удаляет
+модели по очереди. Здесь зависимые строки удаляются пачками по pk прямым
+DELETE без загрузки объектов и сигналов, каждая пачка в своей
+транзакции. Кэши и теги страниц сбрасываются один раз в конце.
+Файлы картинок остаются на диске до сборки мусора в media.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from core.admin import batched_pks
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                     Notification, Post, Recommendation)
+from .utils import invalidate_feeds
+
+BATCH_SIZE = 1000
+
+
+def delete_rows(queryset, batch_size=BATCH_SIZE, progress=None, label=''):
+    """Удаляет строки queryset пачками; возвращает их число."""
+    model, deleted = queryset.model, 0
+    for pks in batched_pks(queryset, batch_size):
+        with transaction.atomic(using=queryset.db):
+            model.objects.filter(pk__in=pks)._raw_delete(queryset.db)
+        deleted += len(pks)
+        if progress:
+            progress(label, deleted)
+    return deleted
+
+
+def update_rows(queryset, values, batch_size=BATCH_SIZE, progress=None,
+                label=''):
+    """UPDATE queryset пачками по pk; возвращает число строк."""
+    model, updated = queryset.model, 0
+    for pks in batched_pks(queryset, batch_size):
+        with transaction.atomic(using=queryset.db):
+            model.objects.filter(pk__in=pks).update(**values)
+        updated += len(pks)
+        if progress:
+            progress(label, updated)
+    return updated
+
+
+def post_ids(*querysets):
+    ids = set()
+    for queryset in querysets:
+        ids.update(queryset.order_by().values_list('post_id', flat=True)
+                   .distinct())
+    return ids
+
+
+def delete_user(user, batch_size=BATCH_SIZE, progress=None):
+    """Удаляет пользователя, его посты, комментарии, подписки и прочее.
+
+    progress(label, count) вызывается после каждой пачки. Возвращает
+    словарь {label: число удалённых строк}.
+    """
+    comments = Comment.objects.filter(Q(author=user) | Q(post__author=user))
+    archived_comments = ArchivedComment.objects.filter(
+        Q(author=user) | Q(post__author=user))
+    posts = Post.objects.filter(author=user)
+    archived_posts = ArchivedPost.objects.filter(author=user)
+    tags = {f'group:{slug}' for queryset in (posts, archived_posts)
+            for slug in queryset.filter(group__isnull=False).order_by()
+            .values_list('group__slug', flat=True).distinct()}
+    tags.update(f'post:{pk}' for pk in post_ids(comments, archived_comments))
+    steps = (
+        ('уведомления', Notification.objects.filter(
+            Q(recipient=user) | Q(actor=user) | Q(post__author=user))),
+        ('комментарии', comments),
+        ('архивные комментарии', archived_comments),
+        ('подписки', Follow.objects.filter(Q(user=user) | Q(author=user))),
+        ('рекомендации', Recommendation.objects.filter(
+            Q(user=user) | Q(author=user))),
+        ('посты', posts),
+        ('архивные посты', archived_posts),
+    )
+    user_id, report = user.pk, {}
+    for label, queryset in steps:
+        report[label] = delete_rows(queryset, batch_size, progress, label)
+    with transaction.atomic():
+        user.delete()
+    report['пользователи'] = 1
+    invalidate_feeds(f'author:{user_id}', *tags)
+    return report
+
+
+def delete_group(group, batch_size=BATCH_SIZE, progress=None):
+    """Удаляет группу; её посты остаются без группы."""
+    tags = {f'post:{pk}' for pk in
+            group.posts.values_list('pk', flat=True).iterator()}
+    report = {}
+    for label, queryset in (('посты', group.posts.all()),
+                            ('архивные посты', group.archived_posts.all())):
+        report[label] = update_rows(queryset, {'group': None}, batch_size,
+                                    progress, label)
+    with transaction.atomic():
+        group.delete()
+    report['группы'] = 1
+    invalidate_feeds(*tags)
+    return report
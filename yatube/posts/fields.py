@@ -0,0 +1,44 @@
+from django.db import models
+
+from .constants import ELLIPSIS, EXCERPT_LENGTH
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    if len(text) <= length:
+        return text
+    return text[:length - 1].rstrip() + ELLIPSIS
+
+
+class ExcerptField(models.CharField):
+    """Начало текста из поля source, пересчитываемое при каждой записи.
+
+    Считается в pre_save, поэтому заполняется и при save(), и при
+    bulk_create. Ленты читают его вместо полного текста. Если задан
+    flag, в это булево поле записывается, обрезан ли текст; объявлять
+    его нужно после самого ExcerptField.
+    """
+
+    def __init__(self, *args, source='text', length=EXCERPT_LENGTH,
+                 flag=None, **kwargs):
+        self.source = source
+        self.flag = flag
+        kwargs['max_length'] = length
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('blank', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        kwargs['length'] = kwargs.pop('max_length')
+        if self.flag:
+            kwargs['flag'] = self.flag
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        text = getattr(model_instance, self.source)
+        value = make_excerpt(text, self.max_length)
+        setattr(model_instance, self.attname, value)
+        if self.flag:
+            setattr(model_instance, self.flag, len(text) > self.max_length)
+        return value
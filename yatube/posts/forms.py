@@ -1,5 +1,8 @@
+from django import forms
 from django.forms import ModelForm
+from django.utils import timezone
 
+from .lookups import group_list
 from .models import Comment, Post
 
 
@@ -8,8 +11,28 @@ class PostForm(ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group = self.fields['group']
+        group.choices = [('', group.empty_label)] + [
+            (item.pk, str(item)) for item in group_list()]
+
 
 class CommentForm(ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class ScheduleForm(forms.Form):
+    publish_at = forms.DateTimeField(
+        label='Опубликовать позже',
+        required=False,
+        help_text='Оставьте пустым, чтобы опубликовать сразу',
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at and publish_at <= timezone.now():
+            raise forms.ValidationError('Укажите время в будущем')
+        return publish_at
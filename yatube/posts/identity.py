@@ -0,0 +1,87 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from .models import Group, User
+
+IDENTITY_TTL = 60
+IDENTITY_SIZE = 1024
+
+
+class IdentityCache:
+    """Кэш объектов по pk на уровне процесса.
+
+    Хранит узкие копии строк (только fields) не дольше ttl секунд и не
+    больше maxsize штук: давно не читанные вытесняются первыми.
+    Отдаёт копии, чтобы запросы не делили один экземпляр модели.
+    Записи сбрасываются сигналами из posts.signals; в других процессах
+    устаревшая запись живёт не дольше ttl.
+    """
+
+    def __init__(self, model, fields, ttl=IDENTITY_TTL,
+                 maxsize=IDENTITY_SIZE):
+        self.model = model
+        self.fields = fields
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, pks):
+        now = time.monotonic()
+        found, missing = {}, set()
+        with self.lock:
+            for pk in pks:
+                entry = self.entries.get(pk)
+                if entry and entry[0] > now:
+                    self.entries.move_to_end(pk)
+                    found[pk] = entry[1]
+                else:
+                    missing.add(pk)
+        if missing:
+            loaded = self.model.objects.only(*self.fields).in_bulk(missing)
+            with self.lock:
+                for pk, obj in loaded.items():
+                    self.entries[pk] = (now + self.ttl, obj)
+                    self.entries.move_to_end(pk)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+            found.update(loaded)
+        return {pk: copy.copy(obj) for pk, obj in found.items()}
+
+    def invalidate(self, pk):
+        with self.lock:
+            self.entries.pop(pk, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+authors = IdentityCache(User, ('username', 'first_name', 'last_name'))
+groups = IdentityCache(Group, ('title', 'slug'))
+
+
+def attach_authors_and_groups(page, author=None, group=None):
+    """Подставляет авторов и группы постов страницы из IdentityCache.
+
+    Каждый автор и каждая группа грузятся один раз на страницу, а не
+    дублируются в JOIN на каждый пост. Уже известные view author или
+    group подставляются без запросов.
+    """
+    page.object_list = attach_related(list(page.object_list), author, group)
+    return page
+
+
+def attach_related(posts, author=None, group=None):
+    """То же для готового списка постов."""
+    author_map = ({author.pk: author} if author else
+                  authors.get_many({post.author_id for post in posts}))
+    group_map = ({group.pk: group} if group else
+                 groups.get_many({post.group_id for post in posts
+                                  if post.group_id}))
+    for post in posts:
+        post.author = author_map[post.author_id]
+        post.group = group_map.get(post.group_id)
+    return posts
@@ -0,0 +1,152 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import send_mass_mail
+from django.utils import timezone
+
+from core.jobs import BATCH_SIZE, enqueue, job, periodic
+
+from .archive import archive_posts
+from .constants import (ARCHIVE_INTERVAL, DIGEST_BATCH_SIZE, DIGEST_INTERVAL,
+                        RECOMMENDATIONS_INTERVAL)
+from .markup import find_references
+from .models import Notification, Post, User
+from .recommendations import rebuild_recommendations
+from .stream import announce
+from .thumbnails import METADATA_FIELDS, image_metadata
+from .utils import invalidate_feeds, post_tags
+
+DIGEST_LOCK = 'posts:digest-sent'
+RECOMMENDATIONS_LOCK = 'posts:recommendations-built'
+ARCHIVE_LOCK = 'posts:archived'
+
+
+@periodic
+def publish_due_posts(batch_size=BATCH_SIZE):
+    """Публикует наступившие отложенные посты одним UPDATE на пачку.
+
+    pub_date становится моментом публикации: по нему идут ленты и курсор
+    потока новых постов, в которых пост должен оказаться последним.
+    """
+    ids = list(Post.objects.filter(
+        is_published=False, publish_at__lte=timezone.now()
+    ).values_list('pk', flat=True)[:batch_size])
+    if ids:
+        Post.objects.filter(pk__in=ids).update(is_published=True,
+                                               pub_date=timezone.now())
+        published = Post.objects.filter(pk__in=ids).only(
+            'pub_date', 'author', 'group')
+        invalidate_feeds(*post_tags(published))
+        announce(published)
+        for pk, author_id, text in published.filter(
+                text__contains='@').values_list('pk', 'author_id', 'text'):
+            enqueue('posts.notify', kind=Notification.MENTION,
+                    actor_id=author_id, post_id=pk, text=text)
+    return len(ids)
+
+
+@job('posts.thumbnail')
+def make_thumbnails(payloads):
+    """Заранее готовит миниатюры и метаданные картинок.
+
+    Запрос страницы тогда не рисует миниатюру сам.
+    """
+    posts = list(Post.objects.filter(
+        pk__in=[payload['post_id'] for payload in payloads]
+    ).exclude(image='').only('image'))
+    processed = []
+    for post in posts:
+        metadata = image_metadata(post.image.name)
+        if metadata is not None:
+            (post.image_width, post.image_height,
+             post.image_placeholder) = metadata
+            processed.append(post)
+    Post.objects.bulk_update(processed, METADATA_FIELDS)
+
+
+@job('posts.notify')
+def notify(payloads):
+    """Раскладывает события пачки в уведомления одним bulk_create.
+
+    payload: kind, actor_id и post_id или author_ids; для комментариев
+    и постов ещё text, из которого берутся @упоминания.
+    """
+    usernames, _ = find_references(
+        payload.get('text', '') for payload in payloads)
+    mentioned = dict(User.objects.filter(username__in=usernames)
+                     .values_list('username', 'pk')) if usernames else {}
+    post_authors = dict(Post.objects.filter(
+        pk__in={payload['post_id'] for payload in payloads
+                if payload.get('post_id')}
+    ).values_list('pk', 'author_id'))
+
+    notifications = []
+    for payload in payloads:
+        actor_id, post_id = payload['actor_id'], payload.get('post_id')
+        recipients = {}
+        for author_id in payload.get('author_ids', ()):
+            recipients[author_id] = Notification.FOLLOW
+        if payload['kind'] == Notification.COMMENT:
+            recipients[post_authors.get(post_id)] = Notification.COMMENT
+        usernames, _ = find_references([payload.get('text', '')])
+        for username in usernames:
+            recipients.setdefault(mentioned.get(username),
+                                  Notification.MENTION)
+        notifications.extend(
+            Notification(recipient_id=recipient_id, actor_id=actor_id,
+                         kind=kind, post_id=post_id)
+            for recipient_id, kind in recipients.items()
+            if recipient_id and recipient_id != actor_id
+        )
+    Notification.objects.bulk_create(notifications)
+
+
+@periodic
+def send_digests(batch_size=DIGEST_BATCH_SIZE):
+    """Раз в DIGEST_INTERVAL шлёт каждому одно письмо о новых событиях.
+
+    Идёт пачками по batch_size получателей, пока не разошлёт всё:
+    уведомления одного получателя всегда попадают в одно письмо.
+    """
+    if not cache.add(DIGEST_LOCK, True, DIGEST_INTERVAL):
+        return 0
+    pending = Notification.objects.filter(
+        emailed=False, is_read=False).exclude(recipient__email='')
+    sent = 0
+    while True:
+        recipients = list(pending.order_by('recipient').values_list(
+            'recipient', flat=True).distinct()[:batch_size])
+        if not recipients:
+            return sent
+        items = list(pending.filter(recipient__in=recipients)
+                     .select_related('recipient', 'actor')
+                     .order_by('recipient', 'id'))
+        messages = []
+        for recipient, group in groupby(items, key=lambda n: n.recipient):
+            lines = [f'{item.actor.username}: {item.get_kind_display()}'
+                     for item in group]
+            messages.append((
+                f'Yatube: новых уведомлений {len(lines)}',
+                '\n'.join(lines),
+                settings.DEFAULT_FROM_EMAIL,
+                [recipient.email],
+            ))
+        send_mass_mail(messages, fail_silently=True)
+        Notification.objects.filter(
+            pk__in=[item.pk for item in items]).update(emailed=True)
+        sent += len(messages)
+
+
+@periodic
+def refresh_recommendations():
+    if not cache.add(RECOMMENDATIONS_LOCK, True, RECOMMENDATIONS_INTERVAL):
+        return 0
+    return rebuild_recommendations()
+
+
+@periodic
+def archive_old_posts():
+    if not cache.add(ARCHIVE_LOCK, True, ARCHIVE_INTERVAL):
+        return 0
+    return archive_posts()
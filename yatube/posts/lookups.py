@@ -0,0 +1,69 @@
+"""Общие для view и шаблонных тегов выборки, запоминаемые на запрос."""
+from django.core.cache import cache
+
+from core.memo import memoize
+from core.tiered import TieredCache
+
+from .models import ArchivedPost, Follow, Group, Post, User
+
+GROUPS_CACHE_KEY = 'posts:groups'
+GROUPS_CACHE_TIMEOUT = 60 * 60
+
+groups_by_slug = TieredCache('posts:group-by-slug')
+users_by_username = TieredCache('posts:user-by-username')
+
+
+def group_list():
+    """Все группы: из памяти запроса, затем из кэша, затем из БД.
+
+    Кэш сбрасывается сигналами сохранения и удаления Group.
+    """
+    def load():
+        groups = cache.get(GROUPS_CACHE_KEY)
+        if groups is None:
+            groups = list(Group.objects.only('title', 'slug')
+                          .order_by('title'))
+            cache.set(GROUPS_CACHE_KEY, groups, GROUPS_CACHE_TIMEOUT)
+        return groups
+    return memoize('groups', load)
+
+
+def forget_groups():
+    cache.delete(GROUPS_CACHE_KEY)
+
+
+def group_by_slug(slug):
+    """Группа по slug или None; сбрасывается сигналами Group."""
+    return groups_by_slug.get(
+        slug, lambda: Group.objects.filter(slug=slug).first())
+
+
+def user_by_username(username):
+    """Пользователь по username или None; сбрасывается сигналами User.
+
+    В кеш попадают только поля, нужные страницам: ни хеша пароля,
+    ни почты.
+    """
+    return users_by_username.get(
+        username, lambda: User.objects.filter(username=username).only(
+            'username', 'first_name', 'last_name').first())
+
+
+def post_count(author_id):
+    """Опубликованные посты автора вместе с ушедшими в архив."""
+    return memoize(
+        ('post_count', author_id),
+        lambda: (
+            Post.objects.published().filter(author_id=author_id).count()
+            + ArchivedPost.objects.filter(author_id=author_id).count()),
+    )
+
+
+def is_following(user, author_id):
+    if not user.is_authenticated:
+        return False
+    return memoize(
+        ('following', user.pk, author_id),
+        lambda: Follow.objects.filter(user=user,
+                                      author_id=author_id).exists(),
+    )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import BATCH_SIZE, archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Возраст поста в днях (по умолчанию '
+                                 'settings.POSTS_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cutoff, total = archive_cutoff(options['days']), 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Перенесено постов: {total}')
@@ -0,0 +1,67 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.admin import batched_pks
+from posts.models import ArchivedPost, Post
+from posts.thumbnails import METADATA_FIELDS, image_metadata
+
+CHUNK_SIZE = 100
+
+
+def process(item):
+    pk, name = item
+    return pk, image_metadata(name)
+
+
+class Command(BaseCommand):
+    help = ('Рисует миниатюры и заполняет размеры и превью картинок '
+            'старых постов. Повторный запуск продолжает с необработанных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов (1 — без пула).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--rate', type=float, default=0,
+                            help='Не больше стольких картинок в секунду '
+                                 '(0 — без ограничения).')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers > 1:
+            # Дочерние процессы не должны делить соединения родителя.
+            connections.close_all()
+            with ProcessPoolExecutor(workers) as pool:
+                self.backfill(pool.map, options)
+        else:
+            self.backfill(map, options)
+
+    def backfill(self, map_func, options):
+        done, started = 0, time.monotonic()
+        for model in (Post, ArchivedPost):
+            pending = model.objects.exclude(image='').filter(
+                image_width__isnull=True)
+            for pks in batched_pks(pending, options['chunk_size']):
+                self.process_chunk(model, pks, map_func)
+                done += len(pks)
+                elapsed = time.monotonic() - started
+                if options['rate']:
+                    pause = done / options['rate'] - elapsed
+                    if pause > 0:
+                        time.sleep(pause)
+                        elapsed += pause
+                self.stdout.write(
+                    f'Обработано картинок: {done} '
+                    f'({done / max(elapsed, 0.001):.1f}/с)')
+
+    @staticmethod
+    def process_chunk(model, pks, map_func):
+        items = model.objects.filter(pk__in=pks).values_list('pk', 'image')
+        model.objects.bulk_update(
+            [model(pk=pk, **dict(zip(METADATA_FIELDS, metadata)))
+             for pk, metadata in map_func(process, items)
+             if metadata is not None],
+            METADATA_FIELDS)
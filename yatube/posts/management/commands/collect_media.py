@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts.orphans import (BATCH_SIZE, MIN_AGE, delete_images, orphan_images,
+                           remove, stale_thumbnails)
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки, на которые не ссылается ни один пост, '
+            'и устаревшие миниатюры.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет удалено.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--min-age', type=int, default=MIN_AGE,
+                            help='Не трогать файлы моложе стольких секунд.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        limits = options['batch_size'], options['min_age']
+        images = self.collect(
+            orphan_images(*limits), delete_images, dry_run)
+        thumbnails = self.collect(
+            stale_thumbnails(*limits),
+            lambda names: [remove(name) for name in names], dry_run)
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        for label, (count, size) in (('картинок', images),
+                                     ('миниатюр', thumbnails)):
+            self.stdout.write(
+                f'{verb} {label}: {count}, {filesizeformat(size)}')
+
+    def collect(self, batches, delete, dry_run):
+        count = size = 0
+        for batch in batches:
+            if self.verbosity > 1:
+                for name, _ in batch:
+                    self.stdout.write(name)
+            if not dry_run:
+                delete([name for name, _ in batch])
+            count += len(batch)
+            size += sum(item_size for _, item_size in batch)
+        return count, size
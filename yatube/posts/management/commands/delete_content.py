@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import BATCH_SIZE, delete_group, delete_user
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователей со всем содержимым или группы '
+            'пачками, без загрузки связанных объектов в память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[],
+                            help='username; можно указать несколько раз.')
+        parser.add_argument('--group', action='append', default=[],
+                            help='slug группы; можно указать несколько раз.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        targets = []
+        for username in options['user']:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {username}')
+            targets.append((user, delete_user))
+        for slug in options['group']:
+            group = Group.objects.filter(slug=slug).first()
+            if group is None:
+                raise CommandError(f'Нет группы {slug}')
+            targets.append((group, delete_group))
+        for obj, delete in targets:
+            report = delete(obj, options['batch_size'], self.progress)
+            self.stdout.write(f'{obj}: ' + ', '.join(
+                f'{label} {count}' for label, count in report.items()))
+
+    def progress(self, label, count):
+        self.stdout.write(f'  {label}: {count}')
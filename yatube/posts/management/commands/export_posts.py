@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (CHUNK_SIZE, FORMATS, TABLES, Throughput, Writer,
+                            iter_rows, load_checkpoint, peak_rss_mb,
+                            save_checkpoint, table_path)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии (вместе с архивом) '
+            'и подписки в NDJSON или CSV, не загружая таблицы в память '
+            'целиком.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить с последней контрольной точки.')
+
+    def handle(self, *args, **options):
+        directory, fmt = options['directory'], options['format']
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = load_checkpoint(directory) if options['resume'] else {}
+        for table, (_, columns) in TABLES.items():
+            after_pk = checkpoint.get(table, 0)
+            writer = Writer(table_path(directory, table, fmt), fmt,
+                            [name for name, _ in columns],
+                            append=bool(after_pk))
+            throughput = Throughput()
+            try:
+                for row in iter_rows(table, after_pk):
+                    writer.write(row)
+                    throughput.rows += 1
+                    if throughput.rows % CHUNK_SIZE == 0:
+                        writer.file.flush()
+                        checkpoint[table] = row['id']
+                        save_checkpoint(directory, checkpoint)
+                    after_pk = row['id']
+            finally:
+                writer.close()
+            checkpoint[table] = after_pk
+            save_checkpoint(directory, checkpoint)
+            self.stdout.write(throughput.report(table))
+        self.stdout.write(f'Пик RSS: {peak_rss_mb():.1f} МБ')
@@ -0,0 +1,57 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.transfer import (CHUNK_SIZE, FORMATS, TABLES, Throughput,
+                            load_checkpoint, peak_rss_mb, read_rows,
+                            save_checkpoint, table_path, write_batch)
+
+IMPORT_CHECKPOINT = 'import'
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_posts пачками через bulk_create. '
+            'Повторный запуск продолжает с контрольной точки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--restart', action='store_true',
+                            help='Игнорировать контрольную точку.')
+
+    def handle(self, *args, **options):
+        directory, fmt = options['directory'], options['format']
+        if not os.path.isdir(directory):
+            raise CommandError(f'Нет каталога {directory}')
+        state = load_checkpoint(directory)
+        done = {} if options['restart'] else state.get(IMPORT_CHECKPOINT, {})
+        for table in TABLES:
+            path = table_path(directory, table, fmt)
+            if not os.path.exists(path):
+                continue
+            throughput = Throughput()
+            skip = done.get(table, 0)
+            batch = []
+            for number, row in enumerate(read_rows(path, fmt), 1):
+                if number <= skip:
+                    continue
+                batch.append(row)
+                if len(batch) == CHUNK_SIZE:
+                    throughput.rows += self.flush(table, batch, number,
+                                                  directory, state, done)
+                    batch = []
+            if batch:
+                throughput.rows += self.flush(table, batch, number,
+                                              directory, state, done)
+            self.stdout.write(throughput.report(table))
+        self.stdout.write(f'Пик RSS: {peak_rss_mb():.1f} МБ')
+
+    @staticmethod
+    def flush(table, batch, number, directory, state, done):
+        with transaction.atomic():
+            written = write_batch(table, batch)
+        done[table] = number
+        state[IMPORT_CHECKPOINT] = done
+        save_checkpoint(directory, state)
+        return written
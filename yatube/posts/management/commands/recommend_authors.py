@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_recommendations()
+        self.stdout.write(f'Рекомендаций: {count} '
+                          f'за {time.perf_counter() - start:.2f} с')
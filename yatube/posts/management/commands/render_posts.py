@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.markup import render_posts
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Заполняет Post.text_html пачками (по умолчанию только пустые).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Перерисовать все посты.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('text').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        batch_size, last_pk, total = options['batch_size'], 0, 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            Post.objects.bulk_update(render_posts(batch), ['text_html'])
+            last_pk = batch[-1].pk
+            total += len(batch)
+            self.stdout.write(f'Обработано постов: {total}')
@@ -0,0 +1,78 @@
+"""Разметка текста поста: абзацы, ссылки, @упоминания и #группы.
+
+HTML считается при записи поста и хранится в Post.text_html, чтобы
+регулярные выражения не гонялись на каждом показе страницы.
+"""
+import re
+
+from django.urls import reverse
+from django.utils.html import escape, linebreaks
+
+from .models import Group, User
+
+TOKEN = re.compile(
+    r'(?P<url>https?://[^\s<>"]+)'
+    r'|(?<![\w@])@(?P<username>[\w.+-]*\w)'
+    r'|(?<![\w&#])#(?P<slug>[-\w]*\w)'
+)
+URL_TRAILING = '.,:;!?)'
+
+
+def find_references(texts):
+    """Все упомянутые username и slug групп в наборе текстов."""
+    usernames, slugs = set(), set()
+    for text in texts:
+        for match in TOKEN.finditer(text):
+            if match['username']:
+                usernames.add(match['username'])
+            elif match['slug']:
+                slugs.add(match['slug'])
+    return usernames, slugs
+
+
+def resolve_references(usernames, slugs):
+    """Оставляет только существующих пользователей и группы."""
+    return (
+        set(User.objects.filter(username__in=usernames)
+            .values_list('username', flat=True)) if usernames else set(),
+        set(Group.objects.filter(slug__in=slugs)
+            .values_list('slug', flat=True)) if slugs else set(),
+    )
+
+
+def link(url, label):
+    return f'<a href="{escape(url)}">{escape(label)}</a>'
+
+
+def render_text(text, usernames, slugs):
+    """Текст в HTML; ссылки ставятся только на известные usernames/slugs."""
+    parts, position = [], 0
+    for match in TOKEN.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        token, tail = match.group(), ''
+        if match['url']:
+            url = token.rstrip(URL_TRAILING)
+            tail = token[len(url):]
+            token = (f'<a href="{escape(url)}" rel="nofollow">'
+                     f'{escape(url)}</a>')
+        elif match['username'] in usernames:
+            token = link(reverse('posts:profile', args=[match['username']]),
+                         token)
+        elif match['slug'] in slugs:
+            token = link(reverse('posts:group_list', args=[match['slug']]),
+                         token)
+        else:
+            token = escape(token)
+        parts.append(token + escape(tail))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return linebreaks(''.join(parts), autoescape=False)
+
+
+def render_posts(posts):
+    """Заполняет text_html у пачки постов двумя запросами на всю пачку."""
+    usernames, slugs = resolve_references(
+        *find_references(post.text for post in posts))
+    for post in posts:
+        post.text_html = render_text(post.text, usernames, slugs)
+    return posts
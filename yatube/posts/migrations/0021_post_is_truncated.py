@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:22
+
+from django.db import migrations, models
+from django.db.models.functions import Length
+import posts.fields
+
+EXCERPT_LENGTH = 300
+
+
+def fill_is_truncated(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        model.objects.filter(pk__in=model.objects.annotate(
+            length=Length('text')
+        ).filter(length__gt=EXCERPT_LENGTH).values('pk')).update(
+            is_truncated=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='is_truncated',
+            field=models.BooleanField(default=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='excerpt',
+            field=posts.fields.ExcerptField(blank=True, editable=False, flag='is_truncated', length=300, source='text', verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_is_truncated, migrations.RunPython.noop),
+    ]
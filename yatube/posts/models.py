@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .fields import ExcerptField
+
 User = get_user_model()
 
 
@@ -13,15 +15,44 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(is_published=True)
+
+    def visible_to(self, user):
+        """Опубликованные посты и отложенные посты самого user."""
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(models.Q(is_published=True) | models.Q(author=user))
+
+    def for_feed(self):
+        """Опубликованные посты только с полями карточки ленты."""
+        return self.published().only(
+            'pub_date', 'excerpt', 'is_truncated', 'image',
+            'image_placeholder', 'author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Tекст поста',
         help_text='Введите текст поста'
     )
+    excerpt = ExcerptField('Начало текста', flag='is_truncated')
+    is_truncated = models.BooleanField('Текст обрезан', default=False,
+                                       editable=False)
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
+    )
+    publish_at = models.DateTimeField(
+        'Отложенная публикация',
+        null=True,
+        blank=True,
+        db_index=True
     )
+    is_published = models.BooleanField('Опубликован', default=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -33,6 +64,12 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_placeholder = models.TextField(
+        'Размытое превью картинки', blank=True, editable=False)
 
     group = models.ForeignKey(Group,
                               on_delete=models.SET_NULL,
@@ -43,6 +80,10 @@ class Post(models.Model):
                               help_text='Группа, к которой будет'
                                         ' относиться пост',)
 
+    objects = PostQuerySet.as_manager()
+
+    is_archived = False
+
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'posts'
@@ -61,7 +102,8 @@ class Comment(models.Model):
                                related_name='comments')
     text = models.TextField()
     created = models.DateTimeField('Дата публикации',
-                                   auto_now_add=True)
+                                   auto_now_add=True,
+                                   db_index=True)
 
 
 class Follow(models.Model):
@@ -73,3 +115,127 @@ class Follow(models.Model):
                                on_delete=models.CASCADE,
                                blank=True,
                                related_name='following')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        )
+
+
+class Notification(models.Model):
+    FOLLOW = 'follow'
+    COMMENT = 'comment'
+    MENTION = 'mention'
+    KINDS = (
+        (FOLLOW, 'Подписка'),
+        (COMMENT, 'Комментарий'),
+        (MENTION, 'Упоминание'),
+    )
+
+    recipient = models.ForeignKey(User,
+                                  on_delete=models.CASCADE,
+                                  related_name='notifications')
+    actor = models.ForeignKey(User,
+                              on_delete=models.CASCADE,
+                              related_name='+')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    post = models.ForeignKey(Post,
+                             on_delete=models.SET_NULL,
+                             null=True,
+                             blank=True,
+                             related_name='+')
+    created = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(default=False)
+    emailed = models.BooleanField(default=False, db_index=True)
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = (
+            models.Index(fields=('recipient', '-id'),
+                         name='notification_inbox'),
+        )
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.recipient_id}'
+
+
+class Recommendation(models.Model):
+    """Автор, которого стоит предложить пользователю (считается офлайн)."""
+
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='recommendations')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_recommendation'),
+        )
+        indexes = (
+            models.Index(fields=('user', '-score'),
+                         name='recommendation_user_score'),
+        )
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, вынесенный из горячей таблицы posts_post.
+
+    id совпадает с id исходного поста, поэтому ссылки продолжают
+    работать: post_detail и profile ищут здесь, если поста нет в Post.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Tекст поста')
+    excerpt = models.CharField('Начало текста', max_length=300, blank=True)
+    is_truncated = models.BooleanField('Текст обрезан', default=False)
+    text_html = models.TextField('Текст в HTML', blank=True)
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='archived_posts')
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True)
+    image_placeholder = models.TextField(
+        'Размытое превью картинки', blank=True)
+    group = models.ForeignKey(Group,
+                              on_delete=models.SET_NULL,
+                              blank=True,
+                              null=True,
+                              related_name='archived_posts',
+                              verbose_name='Группа')
+
+    is_published = True
+    is_archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             related_name='comments')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_comments')
+    text = models.TextField()
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('created',)
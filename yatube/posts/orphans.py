@@ -0,0 +1,112 @@
+"""Поиск файлов в MEDIA_ROOT, на которые больше ничего не ссылается.
+
+Дерево обходится os.scandir без построения полного списка. Имена
+проверяются по БД пачками, поэтому память не растёт с числом файлов.
+Миниатюры sorl-thumbnail считаются устаревшими, если их нет в хранилище
+ключей: его ведёт сам sorl, и после удаления исходника оно чистится.
+Работает только с файловым хранилищем.
+"""
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from .models import ArchivedPost, Post
+from .thumbnails import fetch_raw
+
+BATCH_SIZE = 500
+MIN_AGE = 60 * 60
+IMAGE_DIR = 'posts'
+
+
+def scan(directory, min_age=MIN_AGE):
+    """(имя относительно MEDIA_ROOT, размер) файлов старше min_age секунд.
+
+    Свежие файлы пропускаются: пост с только что загруженной картинкой
+    мог ещё не попасть в БД.
+    """
+    cutoff = time.time() - min_age
+    stack = [os.path.join(settings.MEDIA_ROOT, directory)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime < cutoff:
+                        name = os.path.relpath(entry.path,
+                                               settings.MEDIA_ROOT)
+                        yield name.replace(os.sep, '/'), stat.st_size
+
+
+def chunks(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def referenced_images(names):
+    """Те из names, что стоят в image горячих или архивных постов."""
+    used = set()
+    for model in (Post, ArchivedPost):
+        used.update(model.objects.filter(image__in=names)
+                    .values_list('image', flat=True))
+    return used
+
+
+def known_thumbnails(names):
+    """Те из names, что записаны в хранилище ключей sorl.
+
+    Читает через настроенный THUMBNAIL_KVSTORE: таблицу sorl в БД ведёт
+    только cached_db, с другим хранилищем все миниатюры сочлись бы
+    устаревшими.
+    """
+    keys = {add_prefix(ImageFile(name, default.storage).key): name
+            for name in names}
+    return {keys[key] for key in fetch_raw(list(keys))}
+
+
+def orphan_images(batch_size=BATCH_SIZE, min_age=MIN_AGE):
+    """Пачки (имя, размер) картинок постов, на которые нет ссылок."""
+    for batch in chunks(scan(IMAGE_DIR, min_age), batch_size):
+        used = referenced_images([name for name, _ in batch])
+        orphans = [item for item in batch if item[0] not in used]
+        if orphans:
+            yield orphans
+
+
+def stale_thumbnails(batch_size=BATCH_SIZE, min_age=MIN_AGE):
+    """Пачки (имя, размер) миниатюр, о которых sorl уже не знает."""
+    directory = thumbnail_settings.THUMBNAIL_PREFIX.strip('/')
+    for batch in chunks(scan(directory, min_age), batch_size):
+        known = known_thumbnails([name for name, _ in batch])
+        stale = [item for item in batch if item[0] not in known]
+        if stale:
+            yield stale
+
+
+def delete_images(names):
+    """Удаляет картинки вместе с их миниатюрами и записями sorl."""
+    for name in names:
+        default.kvstore.delete(ImageFile(name, default.storage))
+        remove(name)
+
+
+def remove(name):
+    try:
+        os.remove(os.path.join(settings.MEDIA_ROOT, name))
+    except FileNotFoundError:
+        pass
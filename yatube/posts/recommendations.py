@@ -0,0 +1,64 @@
+"""Офлайн-расчёт блока «кого читать» по графу подписок и комментариев.
+
+Граф выгружается двумя потоковыми запросами в разреженные множества
+смежности, дальше совпадения считаются Counter'ами в памяти: никаких
+запросов на пользователя. Оценка кандидата — число друзей, которые
+на него подписаны, плюс число постов, обсуждавшихся вместе.
+"""
+from collections import Counter, defaultdict
+from heapq import nlargest
+
+from django.db import transaction
+
+from .constants import MAX_COMMENTERS_PER_POST, RECOMMENDATIONS_TOP_K
+from .models import Comment, Follow, Post, Recommendation
+
+CHUNK_SIZE = 5000
+WRITE_BATCH_SIZE = 1000
+
+
+def load_graph():
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator(CHUNK_SIZE):
+        following[user_id].add(author_id)
+    commenters = defaultdict(set)
+    for post_id, author_id in Comment.objects.values_list(
+            'post_id', 'author_id').iterator(CHUNK_SIZE):
+        commenters[post_id].add(author_id)
+    return following, commenters
+
+
+def score(following, commenters, authors):
+    scores = defaultdict(Counter)
+    for user_id, followed in following.items():
+        for friend_id in followed:
+            scores[user_id].update(following.get(friend_id, ()))
+    for group in commenters.values():
+        if len(group) > MAX_COMMENTERS_PER_POST:
+            continue
+        for user_id in group:
+            scores[user_id].update(group)
+    for user_id, counter in scores.items():
+        excluded = following.get(user_id, set()) | {user_id}
+        candidates = ((author_id, count)
+                      for author_id, count in counter.items()
+                      if author_id in authors and author_id not in excluded)
+        yield user_id, nlargest(RECOMMENDATIONS_TOP_K, candidates,
+                                key=lambda item: item[1])
+
+
+def rebuild_recommendations():
+    """Пересчитывает рекомендации всех пользователей, возвращает их число."""
+    following, commenters = load_graph()
+    authors = set(Post.objects.order_by().values_list('author_id', flat=True)
+                  .distinct())
+    rows = [
+        Recommendation(user_id=user_id, author_id=author_id, score=count)
+        for user_id, top in score(following, commenters, authors)
+        for author_id, count in top
+    ]
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(rows, WRITE_BATCH_SIZE)
+    return len(rows)
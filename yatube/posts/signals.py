@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.tags import purge
+
+from . import identity, lookups, stream
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+from .utils import invalidate_feeds, post_tags
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_author(sender, instance, update_fields=None, **kwargs):
+    identity.authors.invalidate(instance.pk)
+    if not (update_fields and set(update_fields) <= {'last_login'}):
+        lookups.users_by_username.invalidate()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group(sender, instance, **kwargs):
+    identity.groups.invalidate(instance.pk)
+    lookups.forget_groups()
+    lookups.groups_by_slug.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def announce_post(sender, instance, created, **kwargs):
+    if created and instance.is_published:
+        transaction.on_commit(lambda: stream.announce([instance]))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=ArchivedPost)
+@receiver(post_delete, sender=ArchivedPost)
+def purge_post(sender, instance, **kwargs):
+    invalidate_feeds(*post_tags([instance]))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment(sender, instance, **kwargs):
+    purge(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_follow(sender, instance, **kwargs):
+    purge(f'follow:{instance.user_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group(sender, instance, **kwargs):
+    purge(f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author(sender, instance, update_fields=None, **kwargs):
+    if not (update_fields and set(update_fields) <= {'last_login'}):
+        purge(f'author:{instance.pk}')
@@ -0,0 +1,136 @@
+"""Оповещения о новых постах: локальный pub/sub и поток SSE.
+
+Курсор потока — пара (pub_date, pk): pub_date ставится в момент
+публикации, поэтому отложенный пост с меньшим pk всё равно оказывается
+после уже разосланных. Сигнал сохранения поста и воркер публикации
+кладут событие в брокер своего процесса и поднимают позицию последнего
+поста в кеше. Потоки SSE будятся брокером, а события из других процессов
+добирают из БД, когда эта позиция ушла вперёд; в кеше она живёт не
+дольше STREAM_HEARTBEAT, так что без общего кеша процесс перечитывает
+её из БД.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import (STREAM_BUFFER_SIZE, STREAM_HEARTBEAT,
+                        STREAM_LIFETIME, STREAM_RETRY_MS)
+from .models import Post
+
+LATEST_KEY = 'posts:latest-position'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+START = (EPOCH, 0)
+
+
+class Broker:
+    """Кольцевой буфер событий о новых постах для потоков этого процесса."""
+
+    def __init__(self, size=STREAM_BUFFER_SIZE):
+        self.seq = 0
+        self._events = deque(maxlen=size)
+        self._condition = threading.Condition()
+
+    def publish(self, event):
+        with self._condition:
+            self.seq += 1
+            self._events.append((self.seq, event))
+            self._condition.notify_all()
+
+    def wait(self, seq, timeout):
+        """Ждёт событий новее seq; возвращает новый seq и события."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq > seq, timeout)
+            return self.seq, [event for number, event in self._events
+                              if number > seq]
+
+
+broker = Broker()
+
+
+def make_cursor(position):
+    """(pub_date, pk) -> '<микросекунды>-<pk>' для ?since и Last-Event-ID."""
+    pub_date, pk = position
+    return f'{(pub_date - EPOCH) // timedelta(microseconds=1)}-{pk}'
+
+
+def parse_cursor(cursor, default=START):
+    micros, _, pk = cursor.partition('-')
+    if not (micros.isdigit() and pk.isdigit()):
+        return default
+    return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def make_event(post):
+    return {'id': post.pk, 'author_id': post.author_id,
+            'group_id': post.group_id,
+            'cursor': make_cursor((post.pub_date, post.pk))}
+
+
+def announce(posts):
+    """Сообщает потокам о только что опубликованных постах."""
+    posts = list(posts)
+    if not posts:
+        return
+    latest = max((post.pub_date, post.pk) for post in posts)
+    cache.set(LATEST_KEY, max(latest_position(), latest), STREAM_HEARTBEAT)
+    for post in sorted(posts, key=lambda post: (post.pub_date, post.pk)):
+        broker.publish(make_event(post))
+
+
+def latest_position():
+    latest = cache.get(LATEST_KEY)
+    if latest is None:
+        latest = Post.objects.published().order_by(
+            '-pub_date', '-pk').values_list('pub_date', 'pk').first() or START
+        cache.set(LATEST_KEY, latest, STREAM_HEARTBEAT)
+    return latest
+
+
+def new_posts(since, group_id=None, author_ids=None):
+    pub_date, pk = since
+    posts = Post.objects.published().filter(
+        Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk))
+    if group_id is not None:
+        posts = posts.filter(group_id=group_id)
+    if author_ids is not None:
+        posts = posts.filter(author_id__in=author_ids)
+    return posts
+
+
+def matches(event, group_id=None, author_ids=None):
+    return ((group_id is None or event['group_id'] == group_id)
+            and (author_ids is None or event['author_id'] in author_ids))
+
+
+def event_stream(last, group_id=None, author_ids=None,
+                 lifetime=STREAM_LIFETIME):
+    """Строки text/event-stream; id события — курсор (pub_date, pk)."""
+    yield f'retry: {STREAM_RETRY_MS}\n\n'
+    seq = broker.seq
+    sent = deque(maxlen=STREAM_BUFFER_SIZE)
+    deadline = time.monotonic() + lifetime
+    while time.monotonic() < deadline:
+        latest = latest_position()
+        if latest > last:
+            events = [make_event(post) for post in new_posts(
+                last, group_id, author_ids).only(
+                    'pub_date', 'author', 'group').order_by('pub_date', 'pk')]
+            last = latest
+        else:
+            seq, events = broker.wait(seq, STREAM_HEARTBEAT)
+        events = [event for event in events
+                  if event['id'] not in sent
+                  and matches(event, group_id, author_ids)]
+        for event in events:
+            sent.append(event['id'])
+            last = max(last, parse_cursor(event['cursor']))
+            yield (f'id: {event["cursor"]}\nevent: post\n'
+                   f'data: {json.dumps(event)}\n\n')
+        if not events:
+            yield ': ping\n\n'
@@ -0,0 +1,23 @@
+from django import template
+
+from posts import lookups
+from posts.forms import CommentForm
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_count(author):
+    return lookups.post_count(author.pk)
+
+
+@register.simple_tag(takes_context=True)
+def is_following(context, author):
+    """author — пользователь или его id."""
+    return lookups.is_following(context['request'].user,
+                                getattr(author, 'pk', author))
+
+
+@register.simple_tag
+def comment_form():
+    return CommentForm()
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.admin import EXACT_COUNT_LIMIT, EstimatedCountPaginator, batched_pks
+from posts.deletion import delete_user
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Test', slug='test',
+                                         description='test')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.admin, group=cls.group)
+            for i in range(5)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_count_is_exact_with_gaps_in_pks(self):
+        Post.objects.create(id=EXACT_COUNT_LIMIT * 2, text='Последний',
+                            author=self.admin)
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        self.assertEqual(paginator.count, 6)
+        self.assertEqual(paginator.num_pages, 1)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_batched_pks_cover_queryset(self):
+        pks = [pk for batch in batched_pks(Post.objects.all(), 2)
+               for pk in batch]
+        self.assertEqual(
+            pks, list(Post.objects.order_by('pk').values_list('pk',
+                                                              flat=True)))
+
+    def test_delete_in_batches_action(self):
+        post = Post.objects.first()
+        Comment.objects.create(post=post, author=self.admin, text='Текст')
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'delete_in_batches',
+            '_selected_action': list(
+                Post.objects.values_list('pk', flat=True)),
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_clear_group_action(self):
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'clear_group',
+            '_selected_action': list(
+                Post.objects.values_list('pk', flat=True)),
+        })
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+
+
+class FastDeletionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Test', slug='test')
+        for i in range(5):
+            post = Post.objects.create(text=f'Пост {i}', author=self.author,
+                                       group=self.group)
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Текст')
+        self.other = Post.objects.create(text='Чужой', author=self.reader)
+        Comment.objects.create(post=self.other, author=self.author,
+                               text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.admin)
+
+    def test_delete_user_removes_content_in_batches(self):
+        progress = []
+        report = delete_user(self.author, batch_size=2,
+                             progress=lambda *args: progress.append(args))
+        self.assertEqual(report['посты'], 5)
+        self.assertEqual(report['комментарии'], 6)
+        self.assertIn(('посты', 4), progress)
+        self.assertFalse(User.objects.filter(username='Author').exists())
+        self.assertEqual(list(Post.objects.all()), [self.other])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_user_admin_action(self):
+        self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_with_content',
+            '_selected_action': [self.author.pk],
+        })
+        self.assertFalse(Post.objects.filter(author__username='Author')
+                         .exists())
+        self.assertFalse(User.objects.filter(username='Author').exists())
+
+    def test_group_admin_action_keeps_posts(self):
+        self.client.post(reverse('admin:posts_group_changelist'), {
+            'action': 'delete_fast',
+            '_selected_action': [self.group.pk],
+        })
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.count(), 6)
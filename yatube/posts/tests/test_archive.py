@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.constants import FIRST_TEN
+from posts.lookups import post_count
+from posts.models import ArchivedPost, Comment, Notification, Post, User
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        self.old = Post.objects.create(text='Старый', author=self.author)
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        Comment.objects.create(post=self.old, author=self.author,
+                               text='Старый комментарий')
+        self.fresh = [Post.objects.create(text=f'Новый {i}',
+                                          author=self.author)
+                      for i in range(FIRST_TEN)]
+
+    def test_old_posts_move_to_archive(self):
+        self.assertEqual(archive_posts(days=365, batch_size=1), 1)
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.comments.get().text,
+                         'Старый комментарий')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_post_count_includes_archive(self):
+        archive_posts(days=365)
+        self.assertEqual(post_count(self.author.pk), FIRST_TEN + 1)
+
+    def test_notifications_survive_archiving(self):
+        reader = User.objects.create_user(username='Reader')
+        notification = Notification.objects.create(
+            recipient=self.author, actor=reader, kind=Notification.COMMENT,
+            post=self.old)
+        archive_posts(days=365)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.post_id)
+
+    def test_detail_falls_back_to_archive(self):
+        archive_posts(days=365)
+        response = self.client.get(reverse('posts:post_detail',
+                                           args=[self.old.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['post'].is_archived)
+        self.assertEqual([comment.text for comment
+                          in response.context['comments']],
+                         ['Старый комментарий'])
+
+    def test_profile_continues_into_archive(self):
+        archive_posts(days=365)
+        url = reverse('posts:profile', args=[self.author.username])
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(first.paginator.count, FIRST_TEN + 1)
+        last = self.client.get(url, {'page': 2}).context['page_obj']
+        self.assertEqual([post.pk for post in last], [self.old.pk])
+
+    def test_index_reads_only_hot_table(self):
+        archive_posts(days=365)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(self.old.pk,
+                         [post.pk for post in response.context['page_obj']])
@@ -7,6 +7,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from posts.forms import PostForm
 from posts.models import Comment, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -133,3 +134,22 @@ class CommentCreateFormTests(TestCase):
         self.assertEqual(comment, response.context['comments'][0])
         self.assertEqual(form_data['text'],
                          response.context['comments'][1].text)
+
+
+class GroupChoicesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Test', slug='test',
+                                          description='test')
+
+    def test_group_choices_come_from_cache(self):
+        PostForm()
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertIn((self.group.pk, 'Test'), choices)
+
+    def test_group_save_refreshes_choices(self):
+        PostForm()
+        Group.objects.create(title='Новая', slug='new', description='new')
+        titles = [title for _, title in PostForm().fields['group'].choices]
+        self.assertIn('Новая', titles)
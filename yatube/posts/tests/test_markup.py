@@ -0,0 +1,46 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.markup import render_posts, render_text
+from posts.models import Group, Post, User
+
+
+class MarkupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(title='Кошки', slug='cats',
+                                         description='test')
+
+    def test_links_known_mentions_and_groups(self):
+        html = render_text('@leo и @nobody пишут в #cats и #dogs',
+                           {'leo'}, {'cats'})
+        self.assertIn('<a href="/profile/leo/">@leo</a>', html)
+        self.assertIn('<a href="/group/cats/">#cats</a>', html)
+        self.assertIn('@nobody', html)
+        self.assertNotIn('/group/dogs/', html)
+
+    def test_escapes_text_and_links_urls(self):
+        html = render_text('<b>смотри</b> https://example.com/a?b=1&c=2.\n'
+                           'вторая строка', set(), set())
+        self.assertIn('&lt;b&gt;', html)
+        self.assertIn(
+            '<a href="https://example.com/a?b=1&amp;c=2" rel="nofollow">',
+            html)
+        self.assertIn('</a>.<br>', html)
+
+    def test_render_posts_batch_uses_two_queries(self):
+        posts = [Post(text='@leo', author=self.author),
+                 Post(text='#cats', author=self.author)]
+        with self.assertNumQueries(2):
+            render_posts(posts)
+        self.assertIn('/profile/leo/', posts[0].text_html)
+
+    def test_backfill_command(self):
+        post = Post.objects.create(text='привет @leo', author=self.author)
+        call_command('render_posts', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertIn('/profile/leo/', post.text_html)
@@ -1,6 +1,7 @@
 from django.test import TestCase
 from mixer.backend.django import mixer
 
+from posts.constants import EXCERPT_LENGTH
 from posts.models import Group, Post, User
 
 
@@ -52,3 +53,18 @@ class PostModelTest(TestCase):
                     post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+    def test_excerpt_is_filled_on_bulk_create(self):
+        short, long = Post.objects.bulk_create([
+            Post(text='Коротко', author=self.user),
+            Post(text='а' * (EXCERPT_LENGTH + 1), author=self.user),
+        ])
+        self.assertEqual(short.excerpt, 'Коротко')
+        self.assertFalse(short.is_truncated)
+        self.assertEqual(len(long.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(long.is_truncated)
+
+    def test_short_text_ending_with_ellipsis_is_not_truncated(self):
+        post = Post.objects.create(text='Ну и…', author=self.user)
+        self.assertEqual(post.excerpt, 'Ну и…')
+        self.assertFalse(Post.objects.get(pk=post.pk).is_truncated)
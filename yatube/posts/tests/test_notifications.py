@@ -0,0 +1,114 @@
+import json
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from posts.constants import INBOX_PAGE_SIZE
+from posts.jobs import notify, publish_due_posts, send_digests
+from posts.models import Notification, Post, User
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author',
+                                               email='a@example.com')
+        self.reader = User.objects.create_user(username='reader')
+        self.friend = User.objects.create_user(username='friend')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def test_batch_fan_out(self):
+        with self.assertNumQueries(3):
+            notify([
+                {'kind': Notification.COMMENT, 'actor_id': self.reader.pk,
+                 'post_id': self.post.pk, 'text': 'Смотри, @friend'},
+                {'kind': Notification.FOLLOW, 'actor_id': self.reader.pk,
+                 'author_ids': [self.author.pk]},
+            ])
+        self.assertSetEqual(
+            set(Notification.objects.values_list('recipient__username',
+                                                 'kind')),
+            {('author', Notification.COMMENT),
+             ('friend', Notification.MENTION),
+             ('author', Notification.FOLLOW)})
+
+    def test_no_self_notification(self):
+        notify([{'kind': Notification.COMMENT, 'actor_id': self.author.pk,
+                 'post_id': self.post.pk, 'text': 'сам себе'}])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_inbox_cursor_pagination(self):
+        Notification.objects.bulk_create(
+            Notification(recipient=self.author, actor=self.reader,
+                         kind=Notification.FOLLOW)
+            for _ in range(INBOX_PAGE_SIZE + 5))
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['notifications']),
+                         INBOX_PAGE_SIZE)
+        cursor = response.context['next_cursor']
+        response = self.client.get(reverse('posts:notifications'),
+                                   {'before': cursor})
+        self.assertEqual(len(response.context['notifications']), 5)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_digest_groups_by_recipient(self):
+        for _ in range(3):
+            Notification.objects.create(recipient=self.author,
+                                        actor=self.reader,
+                                        kind=Notification.FOLLOW)
+        self.assertEqual(send_digests(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(send_digests(), 0)
+        self.assertFalse(Notification.objects.filter(emailed=False).exists())
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_digest_drains_all_batches(self):
+        self.reader.email = 'r@example.com'
+        self.reader.save()
+        for recipient, actor in ((self.author, self.reader),
+                                 (self.reader, self.author)):
+            for _ in range(2):
+                Notification.objects.create(recipient=recipient, actor=actor,
+                                            kind=Notification.FOLLOW)
+        self.assertEqual(send_digests(batch_size=1), 2)
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox),
+            ['Yatube: новых уведомлений 2'] * 2)
+        self.assertFalse(Notification.objects.filter(emailed=False).exists())
+
+
+class ScheduledMentionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        User.objects.create_user(username='friend')
+        self.client.force_login(self.author)
+
+    def mention_jobs(self):
+        return [json.loads(job.payload) for job in
+                Job.objects.filter(name='posts.notify')]
+
+    def test_mentions_wait_for_publication(self):
+        publish_at = timezone.now() + timedelta(hours=1)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Привет, @friend',
+            'publish_at': publish_at.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        self.assertEqual(self.mention_jobs(), [])
+        post = Post.objects.get()
+        Post.objects.filter(pk=post.pk).update(
+            publish_at=timezone.now() - timedelta(minutes=1))
+        publish_due_posts()
+        [payload] = self.mention_jobs()
+        self.assertEqual(payload['post_id'], post.pk)
+        self.assertEqual(payload['kind'], Notification.MENTION)
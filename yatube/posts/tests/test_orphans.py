@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.functional import empty
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.kvstores.dbm_kvstore import KVStore as DBMKVStore
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00'
+             b'\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C'
+             b'\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00'
+             b'\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CollectMediaTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        cache.clear()
+        author = User.objects.create_user(username='Author')
+        used = default_storage.save('posts/used.gif', ContentFile(SMALL_GIF))
+        orphan = default_storage.save('posts/orphan.gif',
+                                      ContentFile(SMALL_GIF))
+        Post.objects.create(text='Пост', author=author, image=used)
+        self.used_thumbnail = get_thumbnail(used, '10x10').name
+        self.orphan_thumbnail = get_thumbnail(orphan, '10x10').name
+        self.stale = default_storage.save('cache/00/00/stale.jpg',
+                                          ContentFile(b'jpg'))
+        self.used, self.orphan = used, orphan
+
+    def collect(self, **options):
+        out = StringIO()
+        call_command('collect_media', min_age=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_only_reports(self):
+        output = self.collect(dry_run=True)
+        self.assertIn('Будет удалено картинок: 1', output)
+        self.assertTrue(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.stale))
+
+    def test_orphans_and_their_thumbnails_are_removed(self):
+        output = self.collect()
+        self.assertIn('Удалено картинок: 1', output)
+        self.assertIn('Удалено миниатюр: 1', output)
+        for name in (self.orphan, self.orphan_thumbnail, self.stale):
+            self.assertFalse(os.path.exists(
+                os.path.join(TEMP_MEDIA_ROOT, name)), name)
+        for name in (self.used, self.used_thumbnail):
+            self.assertTrue(default_storage.exists(name), name)
+
+    def test_thumbnails_are_read_through_configured_kvstore(self):
+        with override_settings(THUMBNAIL_DBM_FILE=os.path.join(
+                TEMP_MEDIA_ROOT, 'thumbnail_kvstore')):
+            default.kvstore._wrapped = DBMKVStore()
+            try:
+                used_thumbnail = get_thumbnail(self.used, '20x20').name
+                self.collect()
+            finally:
+                default.kvstore._wrapped = empty
+        self.assertTrue(default_storage.exists(used_thumbnail))
+        self.assertFalse(default_storage.exists(self.stale))
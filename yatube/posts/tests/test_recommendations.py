@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, Recommendation, User
+from posts.recommendations import rebuild_recommendations
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me, self.friend, self.star, self.talker, self.quiet = (
+            User.objects.create_user(username=name)
+            for name in ('me', 'friend', 'star', 'talker', 'quiet'))
+        for author in (self.friend, self.star, self.talker, self.quiet):
+            Post.objects.create(text='Пост', author=author)
+        Follow.objects.create(user=self.me, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.star)
+        post = Post.objects.filter(author=self.friend).first()
+        Comment.objects.create(post=post, author=self.me, text='Да')
+        Comment.objects.create(post=post, author=self.talker, text='Нет')
+
+    def test_friends_of_friends_and_co_commenters(self):
+        # 3 чтения, DELETE и INSERT, плюс SAVEPOINT/RELEASE транзакции.
+        with self.assertNumQueries(7):
+            rebuild_recommendations()
+        self.assertSetEqual(
+            set(Recommendation.objects.filter(user=self.me)
+                .values_list('author__username', flat=True)),
+            {'star', 'talker'})
+
+    def test_follow_index_shows_recommendations(self):
+        rebuild_recommendations()
+        self.client.force_login(self.me)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertContains(response, reverse('posts:profile',
+                                              args=['star']))
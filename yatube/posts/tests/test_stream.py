@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, modify_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import stream
+from posts.jobs import publish_due_posts
+from posts.models import Follow, Group, Post, User
+
+
+class StreamTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(text='Первый', author=self.author)
+        cache.clear()
+
+    def publish(self, **kwargs):
+        post = Post.objects.create(text='Новый', author=self.author,
+                                   **kwargs)
+        stream.announce([post])
+        return post
+
+    def test_news_without_changes_skips_database(self):
+        latest = stream.make_cursor(stream.latest_position())
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:news'),
+                                       {'since': latest})
+        self.assertEqual(response.json(), {'latest': latest, 'count': 0})
+
+    def test_news_counts_posts_by_feed(self):
+        since = stream.make_cursor(stream.latest_position())
+        self.publish(group=self.group)
+        self.publish()
+        url = reverse('posts:news')
+        self.assertEqual(
+            self.client.get(url, {'since': since}).json()['count'], 2)
+        self.assertEqual(self.client.get(
+            url, {'since': since, 'group': 'group'}).json()['count'], 1)
+        reader = User.objects.create_user(username='Reader')
+        self.client.force_login(reader)
+        self.assertEqual(self.client.get(
+            url, {'since': since, 'feed': 'follow'}).json()['count'], 0)
+        Follow.objects.create(user=reader, author=self.author)
+        self.assertEqual(self.client.get(
+            url, {'since': since, 'feed': 'follow'}).json()['count'], 2)
+
+    def test_stream_pushes_new_posts(self):
+        response = self.client.get(reverse('posts:news_stream'),
+                                   {'group': 'group'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.publish()
+        post = self.publish(group=self.group)
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        cursor = stream.make_cursor((post.pub_date, post.pk))
+        self.assertIn(f'id: {cursor}\n'.encode(), next(chunks))
+
+    @modify_settings(MIDDLEWARE={'append': 'core.middleware.GZipMiddleware'})
+    def test_stream_is_not_compressed(self):
+        response = self.client.get(reverse('posts:news_stream'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(next(iter(response.streaming_content))
+                        .startswith(b'retry:'))
+
+    def test_scheduled_post_with_lower_pk_is_announced(self):
+        scheduled = Post.objects.create(
+            text='Отложенный', author=self.author, is_published=False,
+            publish_at=timezone.now() + timedelta(hours=1))
+        self.publish()
+        since = stream.make_cursor(stream.latest_position())
+        response = self.client.get(reverse('posts:news_stream'),
+                                   HTTP_LAST_EVENT_ID=since)
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        Post.objects.filter(pk=scheduled.pk).update(
+            publish_at=timezone.now())
+        self.assertEqual(publish_due_posts(), 1)
+        self.assertEqual(self.client.get(
+            reverse('posts:news'), {'since': since}).json()['count'], 1)
+        self.assertIn(f'"id": {scheduled.pk},'.encode(), next(chunks))
+
+    def test_other_process_posts_reach_stream(self):
+        response = self.client.get(reverse('posts:news_stream'))
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        post = Post.objects.create(text='Из воркера', author=self.author)
+        cache.delete(stream.LATEST_KEY)
+        self.assertIn(f'"id": {post.pk},'.encode(), next(chunks))
+
+    def test_broker_wakes_waiting_streams(self):
+        broker = stream.Broker(size=2)
+        for number in range(3):
+            broker.publish({'id': number})
+        seq, events = broker.wait(0, timeout=0)
+        self.assertEqual(seq, 3)
+        self.assertEqual(events, [{'id': 1}, {'id': 2}])
+        self.assertEqual(broker.wait(seq, timeout=0), (3, []))
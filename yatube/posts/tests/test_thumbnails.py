@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts.constants import THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS
+from posts.archive import archive_posts
+from posts.models import ArchivedPost, Post, User
+from posts.thumbnails import BROKEN_IMAGE, image_metadata, resolve_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00'
+             b'\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C'
+             b'\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00'
+             b'\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailResolverTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        author = User.objects.create_user(username='Author')
+        self.thumbnails = []
+        for i in range(3):
+            name = default_storage.save(f'posts/{i}.gif',
+                                        ContentFile(SMALL_GIF))
+            Post.objects.create(text='Пост', author=author, image=name)
+            self.thumbnails.append(get_thumbnail(
+                name, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS).url)
+        Post.objects.create(text='Без картинки', author=author)
+        cache.clear()
+
+    def test_page_thumbnails_are_fetched_in_one_query(self):
+        posts = list(Post.objects.order_by('pk'))
+        with self.assertNumQueries(1):
+            resolve_thumbnails(posts)
+        self.assertEqual([post.thumbnail.url for post in posts[:3]],
+                         self.thumbnails)
+        self.assertIsNone(posts[3].thumbnail)
+        with self.assertNumQueries(0):
+            resolve_thumbnails(posts)
+
+    def test_feed_shows_thumbnails(self):
+        response = self.client.get(reverse('posts:index_fragment'))
+        for url in self.thumbnails:
+            self.assertContains(response, url)
+
+    def test_backfill_fills_metadata_and_resumes(self):
+        broken = Post.objects.create(text='Битая', author=User.objects.first(),
+                                     image='posts/missing.gif')
+        out = StringIO()
+        call_command('backfill_images', workers=1, chunk_size=2, stdout=out)
+        self.assertIn('Обработано картинок: 4', out.getvalue())
+        post = Post.objects.exclude(pk=broken.pk).exclude(image='').first()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        broken.refresh_from_db()
+        self.assertEqual(broken.image_width, 0)
+        out = StringIO()
+        call_command('backfill_images', workers=1, stdout=out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_backfill_covers_archive(self):
+        post = Post.objects.exclude(image='').first()
+        call_command('backfill_images', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(archive_posts(days=-1), 4)
+        archived = ArchivedPost.objects.get(pk=post.pk)
+        self.assertEqual((archived.image_width, archived.image_height),
+                         (2, 1))
+        self.assertEqual(archived.image_placeholder, post.image_placeholder)
+        ArchivedPost.objects.update(image_width=None)
+        out = StringIO()
+        call_command('backfill_images', workers=1, stdout=out)
+        self.assertIn('Обработано картинок: 3', out.getvalue())
+        archived.refresh_from_db()
+        self.assertEqual(archived.image_width, 2)
+
+    def test_only_missing_or_unreadable_files_are_marked_broken(self):
+        text = default_storage.save('posts/text.gif', ContentFile(b'text'))
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'dir.gif'))
+        self.assertEqual(image_metadata('posts/missing.gif'), BROKEN_IMAGE)
+        self.assertEqual(image_metadata(text), BROKEN_IMAGE)
+        self.assertIsNone(image_metadata('posts/dir.gif'))
+        pending = Post.objects.create(text='Ошибка хранилища',
+                                      author=User.objects.first(),
+                                      image='posts/dir.gif')
+        call_command('backfill_images', workers=1, stdout=StringIO())
+        pending.refresh_from_db()
+        self.assertIsNone(pending.image_width)
@@ -0,0 +1,120 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                          Group, Post, User)
+from posts.transfer import iter_rows, write_batch
+
+
+class TransferCommandsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Test', slug='test',
+                                          description='test')
+        self.post = Post.objects.create(text='Пост', author=self.author,
+                                        group=self.group,
+                                        image='posts/small.gif')
+        Post.objects.create(text='Без группы', author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def round_trip(self, fmt):
+        call_command('export_posts', self.directory, format=fmt,
+                     stdout=io.StringIO())
+        pub_date = self.post.pub_date
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_posts', self.directory, format=fmt,
+                     stdout=io.StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, 'Пост')
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertEqual(post.group.slug, 'test')
+        self.assertEqual(post.image.name, 'posts/small.gif')
+        self.assertEqual(post.author.username, 'Author')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertTrue(Comment.objects.filter(
+            post=post, author__username='Reader').exists())
+        self.assertTrue(Follow.objects.filter(
+            user__username='Reader', author__username='Author').exists())
+
+    def scheduled_round_trip(self, fmt):
+        publish_at = timezone.now() + timedelta(hours=1)
+        scheduled = Post.objects.create(text='Позже', author=self.author,
+                                        is_published=False,
+                                        publish_at=publish_at)
+        call_command('export_posts', self.directory, format=fmt,
+                     stdout=io.StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', self.directory, format=fmt,
+                     stdout=io.StringIO())
+        scheduled = Post.objects.get(pk=scheduled.pk)
+        self.assertFalse(scheduled.is_published)
+        self.assertEqual(scheduled.publish_at, publish_at)
+        self.assertTrue(Post.objects.get(pk=self.post.pk).is_published)
+
+    def test_scheduled_posts_stay_scheduled(self):
+        for fmt in ('ndjson', 'csv'):
+            with self.subTest(fmt=fmt):
+                self.scheduled_round_trip(fmt)
+
+    def test_ndjson_round_trip(self):
+        self.round_trip('ndjson')
+
+    def test_csv_round_trip(self):
+        self.round_trip('csv')
+
+    def test_import_resumes_from_checkpoint(self):
+        call_command('export_posts', self.directory, stdout=io.StringIO())
+        call_command('import_posts', self.directory, stdout=io.StringIO())
+        Post.objects.filter(pk=self.post.pk).delete()
+        call_command('import_posts', self.directory, stdout=io.StringIO())
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_existing_rows_keep_their_dates(self):
+        rows = list(iter_rows('posts'))
+        for row in rows:
+            row['pub_date'] = (self.post.pub_date
+                               - timedelta(days=1)).isoformat()
+        pub_date = self.post.pub_date
+        Post.objects.exclude(pk=self.post.pk).delete()
+        self.assertEqual(write_batch('posts', rows), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).pub_date,
+                         pub_date)
+        inserted = Post.objects.exclude(pk=self.post.pk).get()
+        self.assertEqual(inserted.pub_date, pub_date - timedelta(days=1))
+
+    def test_archive_round_trip(self):
+        archive_posts(days=-1)
+        call_command('export_posts', self.directory, stdout=io.StringIO())
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_posts', self.directory, stdout=io.StringIO())
+        archived = ArchivedPost.objects.get(pk=self.post.pk)
+        self.assertEqual(archived.excerpt, 'Пост')
+        self.assertEqual(archived.author.username, 'Author')
+        self.assertEqual(ArchivedComment.objects.get().post, archived)
+        self.assertFalse(Post.objects.exists())
+
+    def test_dump_before_archiving_does_not_revive_archived_posts(self):
+        call_command('export_posts', self.directory, stdout=io.StringIO())
+        archive_posts(days=-1)
+        call_command('import_posts', self.directory, restart=True,
+                     stdout=io.StringIO())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.count(), 2)
+        self.assertEqual(archive_posts(days=-1), 0)
@@ -1,11 +1,16 @@
+from datetime import timedelta
+
 from django import forms
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.shortcuts import get_object_or_404
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.constants import FIRST_TEN
+from posts import identity
+from posts.constants import EXCERPT_LENGTH, FIRST_TEN
+from posts.jobs import publish_due_posts
 from posts.models import Follow, Group, Post, User
 
 
@@ -230,13 +235,29 @@ class PostViewsTests(TestCase):
 
     def test_cache_after_delete(self):
         page_first = self.authorized_client.get(reverse('posts:index'))
-        Post.objects.create(text='SSS', author=self.user, group=self.group)
+        # update() не шлёт сигналов, теги кэша не сбрасываются.
+        Post.objects.update(excerpt='SSS')
         page_second = self.authorized_client.get(reverse('posts:index'))
         cache.clear()
         page_clear = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(page_first.content, page_second.content)
         self.assertNotEqual(page_first.content, page_clear.content)
 
+    def test_post_save_purges_cached_pages(self):
+        urls = (reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': 'test'}),
+                reverse('posts:profile', kwargs={'username': 'Author'}))
+        for url in urls:
+            response = self.authorized_client.get(url)
+            self.assertIn(f'author:{self.author.pk}',
+                          response['Surrogate-Key'].split())
+        Post.objects.create(text='SSS', author=self.author, group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.context['page_obj'][0].text,
+                                 'SSS')
+
     def test_auth_follow_unfollow(self):
         author = get_object_or_404(User, username=self.author.username)
         Follow.objects.create(author=author, user=self.user)
@@ -247,3 +268,213 @@ class PostViewsTests(TestCase):
         unfollow = Follow.objects.filter(author=author, user=self.user)
         unfollow.delete()
         self.assertNotIn(unfollow, list(response.context['post_list']))
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='Reader')
+        self.client.force_login(self.user)
+        self.group = Group.objects.create(title='Test', slug='test',
+                                          description='test')
+        self.authors = [User.objects.create_user(username=f'Author{i}')
+                        for i in range(3)]
+        for author in self.authors[:2]:
+            Post.objects.create(text='Тест', author=author, group=self.group)
+        cache.clear()
+
+    def test_follow_is_idempotent(self):
+        url = reverse('posts:profile_follow',
+                      kwargs={'username': self.authors[0].username})
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+
+    def test_unfollow_unknown_user_is_404(self):
+        response = self.client.get(reverse('posts:profile_unfollow',
+                                           kwargs={'username': 'nobody'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_follow_group_authors(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        self.client.post(reverse('posts:follow_batch'), {
+            'group': self.group.slug,
+            'author': [self.authors[2].username, self.user.username],
+        })
+        self.assertSetEqual(
+            set(Follow.objects.filter(user=self.user)
+                .values_list('author__username', flat=True)),
+            {'Author0', 'Author1', 'Author2'})
+
+    def test_batch_unfollow(self):
+        for author in self.authors:
+            Follow.objects.create(user=self.user, author=author)
+        self.client.post(reverse('posts:follow_batch'), {
+            'action': 'unfollow',
+            'author': ['Author0', 'Author1'],
+        })
+        self.assertListEqual(
+            list(Follow.objects.filter(user=self.user)
+                 .values_list('author__username', flat=True)),
+            ['Author2'])
+
+
+class FeedPrefetchTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(title='Test', slug='test',
+                                          description='test')
+        self.author = User.objects.create_user(username='Author',
+                                               first_name='Имя')
+        for i in range(FIRST_TEN):
+            Post.objects.create(text=f'Тест{i}', author=self.author,
+                                group=self.group)
+        identity.authors.clear()
+        identity.groups.clear()
+        cache.clear()
+
+    def test_authors_and_groups_loaded_once_per_page(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Имя')
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('posts:index'))
+
+    def test_author_save_invalidates_identity_cache(self):
+        self.client.get(reverse('posts:index'))
+        self.author.first_name = 'Другое'
+        self.author.save()
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Другое')
+
+    def test_identity_cache_is_bounded(self):
+        users = identity.IdentityCache(User, ('username',), maxsize=2)
+        others = [User.objects.create_user(username=f'User{i}')
+                  for i in range(2)]
+        users.get_many([self.author.pk, others[0].pk])
+        users.get_many([self.author.pk])
+        users.get_many([others[1].pk])
+        self.assertEqual(list(users.entries), [self.author.pk, others[1].pk])
+
+
+class ScheduledPostTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.client.force_login(self.author)
+        cache.clear()
+
+    def test_scheduled_post_is_hidden_until_published(self):
+        publish_at = timezone.now() + timedelta(hours=1)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Позже',
+            'publish_at': publish_at.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        post = Post.objects.get(text='Позже')
+        self.assertFalse(post.is_published)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+
+        Post.objects.filter(pk=post.pk).update(
+            publish_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(publish_due_posts(), 1)
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_publish_invalidates_cached_index(self):
+        Post.objects.create(
+            text='Отложенный пост', author=self.author, is_published=False,
+            publish_at=timezone.now() - timedelta(minutes=1))
+        guest = Client()
+        response = guest.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Отложенный пост')
+        self.assertEqual(publish_due_posts(), 1)
+        response = guest.get(reverse('posts:index'))
+        self.assertContains(response, 'Отложенный пост')
+
+    def test_scheduled_post_detail_is_private(self):
+        post = Post.objects.create(
+            text='Позже', author=self.author, is_published=False,
+            publish_at=timezone.now() + timedelta(hours=1))
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(Client().get(url).status_code, 404)
+
+    def test_cannot_comment_on_others_scheduled_post(self):
+        post = Post.objects.create(
+            text='Позже', author=self.author, is_published=False,
+            publish_at=timezone.now() + timedelta(hours=1))
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='Stranger'))
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        response = stranger.post(url, {'text': 'Подсмотрел'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(post.comments.exists())
+        self.client.post(url, {'text': 'Черновик'})
+        self.assertTrue(post.comments.exists())
+
+
+class FeedExcerptTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.long_post = Post.objects.create(
+            text='слово ' * (EXCERPT_LENGTH // 2), author=self.author)
+        cache.clear()
+
+    def test_feed_defers_full_text(self):
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertTrue(post.is_truncated)
+        self.assertContains(response, 'читать дальше')
+
+
+class FeedFragmentTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        now = timezone.now()
+        self.posts = []
+        for i in range(FIRST_TEN + 3):
+            post = Post.objects.create(text=f'Пост {i}', author=self.author,
+                                       group=self.group)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=i))
+            self.posts.append(post)
+        cache.clear()
+
+    def test_fragments_return_batches_by_cursor(self):
+        urls = (
+            reverse('posts:index_fragment'),
+            reverse('posts:group_fragment', args=['group']),
+            reverse('posts:profile_fragment', args=['Author']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                first = response.context['posts']
+                self.assertEqual(len(first), FIRST_TEN)
+                self.assertEqual(response.context['next_cursor'],
+                                 first[-1].pk)
+                response = self.client.get(
+                    url, {'before': response.context['next_cursor']})
+                self.assertEqual(
+                    [post.pk for post in response.context['posts']],
+                    [post.pk for post in self.posts[FIRST_TEN:]])
+                self.assertIsNone(response.context['next_cursor'])
+
+    def test_fragment_unknown_cursor_is_404(self):
+        response = self.client.get(reverse('posts:index_fragment'),
+                                   {'before': 999999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_elided_page_window(self):
+        Post.objects.bulk_create(
+            Post(text='ещё', author=self.author)
+            for _ in range(FIRST_TEN * 9))
+        response = self.client.get(reverse('posts:group_list',
+                                           args=['group']))
+        self.assertEqual(response.context['page_obj'].page_window,
+                         [1, 2])
+        response = self.client.get(reverse('posts:index'), {'page': 6})
+        self.assertEqual(response.context['page_obj'].page_window,
+                         [1, '…', 4, 5, 6, 7, 8, '…', 11])
@@ -0,0 +1,118 @@
+"""Миниатюры целой страницы постов за один заход в хранилище sorl.
+
+Тег {% thumbnail %} ищет каждую миниатюру в хранилище ключей отдельно:
+кэш, затем таблица БД. Здесь имена миниатюр всех постов страницы
+считаются заранее, записи берутся одним get_many и одним запросом к
+таблице для промахов. Миниатюру, которой ещё нет, создаёт get_thumbnail.
+"""
+import base64
+import logging
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from .constants import (PLACEHOLDER_QUALITY, PLACEHOLDER_SIZE,
+                        THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS,
+                        THUMBNAIL_VARIANTS)
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_placeholder')
+BROKEN_IMAGE = (0, 0, '')
+
+
+def thumbnail_name(source, geometry, options):
+    """Имя миниатюры так же, как его строит ThumbnailBackend."""
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def fetch_raw(keys):
+    """Сырые значения хранилища sorl по ключам: get_many и один SELECT."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        found = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in found.items() if value}
+    found = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        loaded = dict(KVStore.objects.filter(key__in=missing)
+                      .values_list('key', 'value'))
+        fetched = {key: loaded.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(fetched,
+                               thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(fetched)
+    return {key: value for key, value in found.items()
+            if value and value != EMPTY_VALUE}
+
+
+def resolve_thumbnails(posts, geometry=THUMBNAIL_GEOMETRY,
+                       options=THUMBNAIL_OPTIONS):
+    """Проставляет post.thumbnail всем постам; без картинки — None."""
+    keys = {}
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            name = thumbnail_name(ImageFile(post.image), geometry, options)
+            keys[add_prefix(ImageFile(name, default.storage).key)] = post
+    found = fetch_raw(list(keys))
+    for key, post in keys.items():
+        if key in found:
+            post.thumbnail = deserialize_image_file(found[key])
+            continue
+        try:
+            post.thumbnail = get_thumbnail(post.image, geometry, **options)
+        except Exception:
+            logger.exception('Не удалось создать миниатюру %s', post.image)
+    return posts
+
+
+def image_metadata(name):
+    """Рисует миниатюры картинки name и возвращает её метаданные.
+
+    (ширина, высота, data: URI крошечного JPEG для заглушки). Для
+    отсутствующего или нечитаемого файла — (0, 0, ''), чтобы его не
+    пробовать снова. При прочих ошибках — None: пост остаётся
+    необработанным и попадёт в следующий проход.
+    """
+    try:
+        with default_storage.open(name) as file:
+            try:
+                image = Image.open(file)
+                width, height = image.size
+                image = image.convert('RGB')
+            except OSError:
+                logger.warning('Нечитаемая картинка %s', name)
+                return BROKEN_IMAGE
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+        for geometry, options in THUMBNAIL_VARIANTS:
+            get_thumbnail(name, geometry, **options)
+    except FileNotFoundError:
+        logger.warning('Нет файла картинки %s', name)
+        return BROKEN_IMAGE
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+        return None
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return width, height, f'data:image/jpeg;base64,{encoded}'
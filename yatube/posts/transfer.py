@@ -0,0 +1,249 @@
+"""Потоковый экспорт и импорт постов для export_posts/import_posts.
+
+Каждая таблица пишется в свой файл <table>.ndjson или <table>.csv.
+Авторы сохраняются по username, чтобы импорт не зависел от id
+пользователей в целевой базе.
+"""
+import csv
+import json
+import os
+import resource
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.utils.dateparse import parse_datetime
+
+from .constants import EXCERPT_LENGTH
+from .fields import make_excerpt
+from .markup import render_posts
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                     Post, User)
+
+CHUNK_SIZE = 2000
+CHECKPOINT = 'checkpoint.json'
+FORMATS = ('ndjson', 'csv')
+
+# Порядок важен для импорта: посты ссылаются на группы, комментарии
+# на посты. Колонки: (имя в файле, lookup для values()).
+POST_COLUMNS = (
+    ('id', 'id'), ('text', 'text'), ('pub_date', 'pub_date'),
+    ('author', 'author__username'), ('group', 'group_id'),
+    ('image', 'image'),
+)
+COMMENT_COLUMNS = (
+    ('id', 'id'), ('post', 'post_id'), ('author', 'author__username'),
+    ('text', 'text'), ('created', 'created'),
+)
+TABLES = {
+    'groups': (Group, (
+        ('id', 'id'), ('title', 'title'), ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'posts': (Post, POST_COLUMNS + (
+        ('is_published', 'is_published'), ('publish_at', 'publish_at'),
+    )),
+    'archived_posts': (ArchivedPost, POST_COLUMNS),
+    'comments': (Comment, COMMENT_COLUMNS),
+    'archived_comments': (ArchivedComment, COMMENT_COLUMNS),
+    'follows': (Follow, (
+        ('id', 'id'), ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+USER_COLUMNS = {'posts': ('author',), 'archived_posts': ('author',),
+                'comments': ('author',), 'archived_comments': ('author',),
+                'follows': ('user', 'author')}
+DATE_COLUMNS = {'posts': 'pub_date', 'archived_posts': 'pub_date',
+                'comments': 'created', 'archived_comments': 'created'}
+# Пост живёт либо в горячей таблице, либо в архиве: id, уже занятый
+# в парной таблице, при импорте пропускается.
+COUNTERPARTS = {'posts': ArchivedPost, 'archived_posts': Post,
+                'comments': ArchivedComment, 'archived_comments': Comment}
+# Комментарий, чей пост лежит в парной таблице, вставить некуда.
+PARENT_COUNTERPARTS = {'comments': ArchivedPost, 'archived_comments': Post}
+
+
+def table_path(directory, table, fmt):
+    return os.path.join(directory, f'{table}.{fmt}')
+
+
+def load_checkpoint(directory):
+    path = os.path.join(directory, CHECKPOINT)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_checkpoint(directory, checkpoint):
+    path = os.path.join(directory, CHECKPOINT)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(path + '.tmp', path)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def iter_rows(table, after_pk=0):
+    """Строки таблицы по возрастанию pk, читаемые курсором пачками."""
+    model, columns = TABLES[table]
+    queryset = model.objects.filter(pk__gt=after_pk).order_by('pk')
+    for values in queryset.values_list(
+            *(lookup for _, lookup in columns)).iterator(CHUNK_SIZE):
+        yield {
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for (name, _), value in zip(columns, values)
+        }
+
+
+class Writer:
+    def __init__(self, path, fmt, columns, append):
+        exists = append and os.path.exists(path)
+        self.file = open(path, 'a' if append else 'w', newline='',
+                         encoding='utf-8')
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(self.file, fieldnames=columns)
+            if not exists:
+                self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == 'csv':
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def read_rows(path, fmt):
+    with open(path, newline='', encoding='utf-8') as file:
+        if fmt == 'csv':
+            for row in csv.DictReader(file):
+                yield {key: value if value != '' else None
+                       for key, value in row.items()}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def resolve_users(table, rows):
+    """username -> id для пачки строк; недостающих заводит без пароля."""
+    usernames = {row[column] for row in rows
+                 for column in USER_COLUMNS.get(table, ())}
+    if not usernames:
+        return {}
+    ids = dict(User.objects.filter(username__in=usernames)
+               .values_list('username', 'id'))
+    missing = usernames - ids.keys()
+    if missing:
+        User.objects.bulk_create(
+            [User(username=username, password=make_password(None))
+             for username in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(User.objects.filter(username__in=missing)
+                   .values_list('username', 'id'))
+    return ids
+
+
+def parse_bool(value, default):
+    """Булево из NDJSON (true/false) или CSV ('True'/'False')."""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return value in ('True', 'true', '1')
+
+
+def build_objects(table, rows):
+    model, _ = TABLES[table]
+    users = resolve_users(table, rows)
+    objects = []
+    for row in rows:
+        fields = {'id': int(row['id'])}
+        if table == 'groups':
+            fields.update(title=row['title'], slug=row['slug'],
+                          description=row['description'] or '')
+        elif table in ('posts', 'archived_posts'):
+            fields.update(text=row['text'], author_id=users[row['author']],
+                          group_id=row['group'] and int(row['group']),
+                          image=row['image'] or '')
+            if table == 'posts':
+                # В старых выгрузках этих колонок нет: пост опубликован.
+                fields.update(
+                    is_published=parse_bool(row.get('is_published'), True),
+                    publish_at=parse_datetime(row.get('publish_at') or ''))
+            if table == 'archived_posts':
+                fields.update(excerpt=make_excerpt(row['text']),
+                              is_truncated=len(row['text']) > EXCERPT_LENGTH)
+        elif table in ('comments', 'archived_comments'):
+            fields.update(post_id=int(row['post']), text=row['text'],
+                          author_id=users[row['author']])
+        else:
+            fields.update(user_id=users[row['user']],
+                          author_id=users[row['author']])
+        if table in DATE_COLUMNS:
+            fields[DATE_COLUMNS[table]] = parse_datetime(
+                row[DATE_COLUMNS[table]])
+        objects.append(model(**fields))
+    return objects
+
+
+def existing_ids(table, rows):
+    """id пачки, уже занятые в таблице или в её архивной паре."""
+    model, _ = TABLES[table]
+    ids = [int(row['id']) for row in rows]
+    existing = set()
+    for owner in (model, COUNTERPARTS.get(table)):
+        if owner is not None:
+            existing.update(owner.objects.filter(pk__in=ids)
+                            .values_list('pk', flat=True))
+    if table in PARENT_COUNTERPARTS:
+        elsewhere = set(PARENT_COUNTERPARTS[table].objects.filter(
+            pk__in={int(row['post']) for row in rows}
+        ).values_list('pk', flat=True))
+        existing.update(int(row['id']) for row in rows
+                        if int(row['post']) in elsewhere)
+    return existing
+
+
+def write_batch(table, rows):
+    """Вставляет новые строки пачки одним bulk_create, возвращает их число.
+
+    Уже существующие id отсеиваются заранее: их даты трогать нельзя.
+    auto_now_add перезаписывает дату при вставке, поэтому исходные
+    даты вставленных строк возвращаются отдельным bulk_update.
+    """
+    model, _ = TABLES[table]
+    existing = existing_ids(table, rows)
+    rows = [row for row in rows if int(row['id']) not in existing]
+    if not rows:
+        return 0
+    objects = build_objects(table, rows)
+    if table in ('posts', 'archived_posts'):
+        render_posts(objects)
+    column = DATE_COLUMNS.get(table)
+    dates = [getattr(obj, column) for obj in objects] if column else None
+    model.objects.bulk_create(objects, ignore_conflicts=True)
+    if column and model._meta.get_field(column).auto_now_add:
+        for obj, date in zip(objects, dates):
+            setattr(obj, column, date)
+        model.objects.bulk_update(objects, [column])
+    return len(objects)
+
+
+class Throughput:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rows = 0
+
+    def report(self, table):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0
+        return (f'{table}: {self.rows} строк за {elapsed:.2f} с '
+                f'({rate:.0f} строк/с), пик RSS {peak_rss_mb():.1f} МБ')
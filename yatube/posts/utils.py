@@ -1,9 +1,76 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.paginator import Paginator
+from django.db.models import Q
 
-from .constants import FIRST_TEN
+from core.tags import purge
+
+from .constants import ELLIPSIS, FIRST_TEN
+from .identity import groups
+
+PAGES_KEY = 'posts'
+FEED_TAG = 'feed:global'
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+
+class ElidedPaginator(Paginator):
+    def get_elided_page_range(self, number, on_each_side=PAGES_ON_EACH_SIDE,
+                              on_ends=PAGES_ON_ENDS):
+        """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS."""
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
 
 
 def paginator(request, posts):
-    paginator = Paginator(posts, FIRST_TEN)
+    paginator = ElidedPaginator(posts, FIRST_TEN)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page = paginator.get_page(page_number)
+    page.page_window = list(paginator.get_elided_page_range(page.number))
+    return page
+
+
+def posts_before(queryset, cursor, size=FIRST_TEN):
+    """Следующие size постов ленты после cursor = (pub_date, pk).
+
+    Выборка по ключу вместо OFFSET и без COUNT(*): стоимость не растёт
+    с глубиной прокрутки.
+    """
+    if cursor is not None:
+        pub_date, pk = cursor
+        queryset = queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+    return list(queryset.order_by('-pub_date', '-pk')[:size])
+
+
+def post_tags(posts):
+    """Теги кэша для страницы, показывающей posts."""
+    posts = list(posts)
+    group_map = groups.get_many(
+        {post.group_id for post in posts if post.group_id})
+    tags = set()
+    for post in posts:
+        tags.add(f'post:{post.pk}')
+        tags.add(f'author:{post.author_id}')
+        if post.group_id in group_map:
+            tags.add(f'group:{group_map[post.group_id].slug}')
+    return tags
+
+
+def invalidate_feeds(*tags):
+    cache.delete(make_template_fragment_key('index_page'))
+    purge(FEED_TAG, *tags)
@@ -1,71 +1,128 @@
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_POST
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import paginator
+from core.holes import cache_page_with_holes
+from core.jobs import enqueue
+from core.ratelimit import ratelimit
+from core.tags import set_surrogate_keys
 
+from .archive import PostChain
+from .constants import (FIRST_TEN, INBOX_PAGE_SIZE, PAGE_CACHE_TIMEOUT,
+                        RECOMMENDATIONS_TOP_K)
+from .forms import CommentForm, PostForm, ScheduleForm
+from .identity import attach_authors_and_groups, attach_related
+from .lookups import group_by_slug, group_list, user_by_username
+from .markup import render_posts
+from .models import (ArchivedPost, Follow, Group, Notification, Post,
+                     User)
+from .stream import (event_stream, latest_position, make_cursor, new_posts,
+                     parse_cursor)
+from .thumbnails import resolve_thumbnails
+from .utils import FEED_TAG, PAGES_KEY, paginator, post_tags, posts_before
 
-@cache_page(20 * 15)
+
+@cache_page_with_holes(20 * 15, key_prefix='index')
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginator(request, post_list)
+    post_list = Post.objects.for_feed()
+    page_obj = attach_authors_and_groups(paginator(request, post_list))
+    resolve_thumbnails(page_obj.object_list)
     context = {'page_obj': page_obj, 'post_list': post_list}
-    return render(request, 'posts/index.html', context)
+    return set_surrogate_keys(render(request, 'posts/index.html', context),
+                              {FEED_TAG, *post_tags(page_obj)})
 
 
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
-    page_obj = paginator(request, posts)
+    group = group_by_slug(slug)
+    if group is None:
+        raise Http404
+    posts = group.posts.for_feed()
+    page_obj = attach_authors_and_groups(paginator(request, posts),
+                                         group=group)
+    resolve_thumbnails(page_obj.object_list)
     context = {'group': group, 'posts': posts, 'page_obj': page_obj}
-    return render(request, 'posts/group_list.html', context)
+    return set_surrogate_keys(
+        render(request, 'posts/group_list.html', context),
+        {f'group:{group.slug}', *post_tags(page_obj)})
 
 
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginator(request, post_list)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
-    context = {'author': author, 'page_obj': page_obj, 'post_list': post_list,
-               'following': following}
-    return render(request, 'posts/profile.html', context)
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    post_list = author.posts.for_feed()
+    archived = author.archived_posts.only(
+        'pub_date', 'excerpt', 'is_truncated', 'image', 'image_placeholder',
+        'author', 'group')
+    page_obj = attach_authors_and_groups(
+        paginator(request, PostChain(post_list, archived)), author=author)
+    resolve_thumbnails(page_obj.object_list)
+    context = {'author': author, 'page_obj': page_obj, 'post_list': post_list}
+    return set_surrogate_keys(
+        render(request, 'posts/profile.html', context),
+        {f'author:{author.pk}', *post_tags(page_obj)})
 
 
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = (Post.objects.visible_to(request.user).filter(pk=post_id).first()
+            or get_object_or_404(ArchivedPost, pk=post_id))
     author = Post.objects.select_related('author', 'group')
     form = CommentForm()
+    resolve_thumbnails([post])
     comments = post.comments.all()
     context = {'post': post, 'author': author, 'form': form,
                'comments': comments}
-    return render(request, 'posts/post_detail.html', context)
+    response = set_surrogate_keys(
+        render(request, 'posts/post_detail.html', context), post_tags([post]))
+    if not post.is_published:
+        patch_cache_control(response, private=True)
+    return response
 
 
 @login_required
+@ratelimit('post_create', '10/m')
 def post_create(request):
     if request.method == 'POST':
         form = PostForm(request.POST or None,
                         files=request.FILES or None)
+        schedule_form = ScheduleForm(request.POST)
 
-        if form.is_valid():
+        if form.is_valid() and schedule_form.is_valid():
             new_post = form.save(commit=False)
             new_post.author = request.user
+            new_post.publish_at = schedule_form.cleaned_data['publish_at']
+            new_post.is_published = new_post.publish_at is None
+            render_posts([new_post])
             new_post.save()
+            if new_post.image:
+                enqueue('posts.thumbnail', post_id=new_post.pk)
+            # Упоминания отложенного поста уйдут при его публикации.
+            if new_post.is_published and '@' in new_post.text:
+                enqueue('posts.notify', kind=Notification.MENTION,
+                        actor_id=request.user.pk, post_id=new_post.pk,
+                        text=new_post.text)
 
             return redirect('posts:profile', username=request.user)
-        return render(request, 'posts/create_post.html', {'form': form})
+        return render(request, 'posts/create_post.html',
+                      {'form': form, 'schedule_form': schedule_form})
 
     form = PostForm()
-    return render(request, 'posts/create_post.html', {'form': form})
+    return render(request, 'posts/create_post.html',
+                  {'form': form, 'schedule_form': ScheduleForm()})
 
 
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    groups = Group.objects.all()
+    groups = group_list()
 
     if request.user == post.author:
         form = PostForm(request.POST or None,
@@ -73,8 +130,14 @@ def post_edit(request, post_id):
                         instance=post)
 
         if form.is_valid():
-            post = form.save()
+            post = form.save(commit=False)
+            render_posts([post])
+            if 'image' in form.changed_data:
+                post.image_width = post.image_height = None
+                post.image_placeholder = ''
             post.save()
+            if 'image' in form.changed_data and post.image:
+                enqueue('posts.thumbnail', post_id=post.pk)
 
             return redirect('posts:post_detail', post_id=post_id)
         context = {'form': form, 'is_edit': True, 'post': post,
@@ -85,40 +148,206 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment', '20/m')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible_to(request.user),
+                             pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue('posts.notify', kind=Notification.COMMENT,
+                actor_id=request.user.pk, post_id=post.pk,
+                text=comment.text)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(
+    post_list = Post.objects.for_feed().filter(
         author__following__user=request.user).order_by('-pub_date')
-    page_obj = paginator(request, post_list)
-    context = {'page_obj': page_obj, 'post_list': post_list}
+    page_obj = attach_authors_and_groups(paginator(request, post_list))
+    resolve_thumbnails(page_obj.object_list)
+    recommendations = request.user.recommendations.select_related(
+        'author').only('author__username')[:RECOMMENDATIONS_TOP_K]
+    context = {'page_obj': page_obj, 'post_list': post_list,
+               'recommendations': recommendations}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', '30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if author != request.user and not Follow.objects.filter(user=request.user,
-                                                            author=author
-                                                            ).exists():
-        Follow.objects.create(author=author, user=request.user)
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    if author != request.user:
+        _, created = Follow.objects.get_or_create(author=author,
+                                                  user=request.user)
+        if created:
+            enqueue('posts.notify', kind=Notification.FOLLOW,
+                    actor_id=request.user.pk, author_ids=[author.pk])
     return redirect('posts:follow_index')
 
 
 @login_required
+@ratelimit('follow', '30/m', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    if Follow.objects.filter(author=author, user=request.user).exists():
-        unfollow = Follow.objects.filter(author=author, user=request.user)
-        unfollow.delete()
+    deleted, _ = Follow.objects.filter(author__username=username,
+                                       user=request.user).delete()
+    if not deleted:
+        get_object_or_404(User.objects.only('pk'), username=username)
     return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+@ratelimit('follow', '30/m')
+def follow_batch(request):
+    """Подписка или отписка сразу от многих авторов.
+
+    Авторы берутся из списка username в author и из всех авторов
+    группы group. Всё выполняется в одной транзакции массовыми запросами.
+    """
+    condition = Q(username__in=request.POST.getlist('author'))
+    if request.POST.get('group'):
+        condition |= Q(posts__group__slug=request.POST['group'])
+    authors = User.objects.filter(condition).exclude(
+        pk=request.user.pk).values('pk').distinct()
+    with transaction.atomic():
+        if request.POST.get('action') == 'unfollow':
+            Follow.objects.filter(user=request.user,
+                                  author__in=authors).delete()
+        else:
+            followed = set(Follow.objects.filter(
+                user=request.user).values_list('author_id', flat=True))
+            new_ids = [author['pk'] for author in authors
+                       if author['pk'] not in followed]
+            Follow.objects.bulk_create(
+                [Follow(user=request.user, author_id=pk) for pk in new_ids],
+                ignore_conflicts=True,
+            )
+            if new_ids:
+                enqueue('posts.notify', kind=Notification.FOLLOW,
+                        actor_id=request.user.pk, author_ids=new_ids)
+    return redirect('posts:follow_index')
+
+
+def _feed_cursor(request):
+    """(pub_date, pk) поста из ?before=<id> или None для первой порции."""
+    before = request.GET.get('before', '')
+    if not before.isdigit():
+        return None
+    for model in (Post, ArchivedPost):
+        pub_date = model.objects.filter(pk=before).values_list(
+            'pub_date', flat=True).first()
+        if pub_date is not None:
+            return pub_date, int(before)
+    raise Http404
+
+
+def _render_cards(request, posts, tag, author=None, group=None):
+    attach_related(posts, author, group)
+    resolve_thumbnails(posts)
+    next_cursor = posts[-1].pk if len(posts) == FIRST_TEN else None
+    context = {'posts': posts, 'next_cursor': next_cursor}
+    return set_surrogate_keys(
+        render(request, 'posts/includes/post_cards.html', context),
+        {tag, *post_tags(posts)})
+
+
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
+def index_fragment(request):
+    """Следующая порция карточек ленты без обвязки страницы."""
+    posts = posts_before(Post.objects.for_feed(), _feed_cursor(request))
+    return _render_cards(request, posts, FEED_TAG)
+
+
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
+def group_fragment(request, slug):
+    group = group_by_slug(slug)
+    if group is None:
+        raise Http404
+    posts = posts_before(group.posts.for_feed(), _feed_cursor(request))
+    return _render_cards(request, posts, f'group:{group.slug}', group=group)
+
+
+@cache_page_with_holes(PAGE_CACHE_TIMEOUT, key_prefix=PAGES_KEY)
+def profile_fragment(request, username):
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    cursor = _feed_cursor(request)
+    posts = posts_before(author.posts.for_feed(), cursor)
+    if len(posts) < FIRST_TEN:
+        archived = author.archived_posts.only(
+            'pub_date', 'excerpt', 'is_truncated', 'image',
+            'image_placeholder', 'author', 'group')
+        posts += posts_before(archived, cursor, FIRST_TEN - len(posts))
+    return _render_cards(request, posts, f'author:{author.pk}',
+                         author=author)
+
+
+@login_required
+def follow_fragment(request):
+    post_list = Post.objects.for_feed().filter(
+        author__following__user=request.user)
+    posts = posts_before(post_list, _feed_cursor(request))
+    return _render_cards(request, posts, f'follow:{request.user.pk}')
+
+
+def _news_filter(request):
+    """group_id и author_ids для ?group=<slug> и ?feed=follow."""
+    group_id = author_ids = None
+    if request.GET.get('group'):
+        group_id = get_object_or_404(
+            Group.objects.only('pk'), slug=request.GET['group']).pk
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        author_ids = set(Follow.objects.filter(
+            user=request.user).values_list('author_id', flat=True))
+    return group_id, author_ids
+
+
+def news(request):
+    """Есть ли посты новее курсора ?since: для клиентов, которые опрашивают.
+
+    Если since не меньше позиции последнего поста из кеша, БД не трогаем.
+    """
+    since = parse_cursor(request.GET.get('since', ''))
+    latest = latest_position()
+    count = 0
+    if latest > since:
+        count = new_posts(since, *_news_filter(request)).count()
+    return JsonResponse({'latest': make_cursor(latest), 'count': count})
+
+
+def news_stream(request):
+    """Поток Server-Sent Events о новых постах."""
+    last = parse_cursor(request.META.get('HTTP_LAST_EVENT_ID', ''), None)
+    response = StreamingHttpResponse(
+        event_stream(last or latest_position(), *_news_filter(request)),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def notifications(request):
+    """Входящие уведомления с курсором ?before=<id> вместо номера страницы."""
+    items = request.user.notifications.select_related('actor').only(
+        'kind', 'created', 'is_read', 'post_id', 'actor__username')
+    before = request.GET.get('before', '')
+    if before.isdigit():
+        items = items.filter(pk__lt=before)
+    page = list(items[:INBOX_PAGE_SIZE + 1])
+    next_cursor = (page[INBOX_PAGE_SIZE - 1].pk
+                   if len(page) > INBOX_PAGE_SIZE else None)
+    page = page[:INBOX_PAGE_SIZE]
+    unread = [item.pk for item in page if not item.is_read]
+    if unread:
+        Notification.objects.filter(pk__in=unread).update(is_read=True)
+    context = {'notifications': page, 'next_cursor': next_cursor}
+    return render(request, 'posts/notifications.html', context)
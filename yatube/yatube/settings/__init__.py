@@ -0,0 +1,6 @@
+import os
+
+if os.getenv('YATUBE_ENV', 'development') == 'production':
+    from .production import *  # noqa: F401,F403
+else:
+    from .development import *  # noqa: F401,F403